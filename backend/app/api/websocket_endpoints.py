@@ -1,6 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from sqlalchemy.orm import Session
-import json
+import orjson
 import uuid
 import asyncio
 import logging
@@ -11,7 +11,7 @@ from app.models import (
     WebSocketMessage, WebSocketMessageType, WebSocketConnectData,
     WebSocketBossActionRequest, WebSocketActionOutcome
 )
-from app.services.realtime_service import realtime_service
+from app.services.realtime_service import realtime_service, encode_message
 from app.api.auth import get_websocket_user
 
 logger = logging.getLogger(__name__)
@@ -67,24 +67,15 @@ async def websocket_endpoint(
             try:
                 # Receive message
                 data = await websocket.receive_text()
-                message_data = json.loads(data)
                 
-                # Handle message
+                # Handle message; parsing and validation happen in the service
                 await realtime_service.handle_websocket_message(
-                    websocket, session_id, message_data
+                    websocket, session_id, data
                 )
                 
             except WebSocketDisconnect:
                 logger.info(f"WebSocket disconnected: {session_id}")
                 break
-            except json.JSONDecodeError as e:
-                logger.warning(f"Invalid JSON received from {session_id}: {str(e)}")
-                error_message = WebSocketMessage(
-                    type=WebSocketMessageType.ERROR,
-                    data={"error": "Invalid JSON format"},
-                    session_id=session_id
-                )
-                await websocket.send_text(json.dumps(error_message.dict()))
             except Exception as e:
                 logger.error(f"Error handling WebSocket message from {session_id}: {str(e)}")
                 error_message = WebSocketMessage(
@@ -92,9 +83,9 @@ async def websocket_endpoint(
                     data={"error": str(e)},
                     session_id=session_id
                 )
-                try:
-                    await websocket.send_text(json.dumps(error_message.dict()))
-                except:
+                if not await websocket_manager.send_personal_message(
+                    encode_message(error_message), session_id
+                ):
                     break
     
     except Exception as e:
@@ -123,9 +114,9 @@ async def _heartbeat_task(websocket: WebSocket, session_id: str):
                 session_id=session_id
             )
             
-            try:
-                await websocket.send_text(json.dumps(heartbeat_message.dict()))
-            except:
+            if not await websocket_manager.send_personal_message(
+                encode_message(heartbeat_message), session_id
+            ):
                 # Connection closed
                 break
                 
@@ -183,8 +174,8 @@ async def broadcast_to_game(
 ):
     """Broadcast a message to all WebSocket sessions of a game"""
     try:
-        sent_count = await websocket_manager.broadcast_to_game(
-            message, game_id, exclude_session
+        sent_count = await websocket_manager.broadcast_bytes(
+            orjson.dumps(message), game_id, exclude_session
         )
         
         return {
@@ -3,10 +3,12 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 import redis.asyncio as redis
-from typing import Generator, AsyncGenerator
+from typing import Generator, AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 from app.config import settings
 import asyncio
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +16,24 @@ logger = logging.getLogger(__name__)
 print(f"DEBUG: Database URL being used: {settings.database_url}")
 
 # Database setup
+if "sqlite" in settings.database_url:
+    pool_options = {
+        "poolclass": StaticPool,
+        "connect_args": {"check_same_thread": False}
+    }
+else:
+    # Keep warm connections for the many short-lived sessions of the WebSocket service
+    pool_options = {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow
+    }
+
 engine = create_engine(
     settings.database_url,
-    poolclass=StaticPool,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
     echo=settings.debug,
     pool_pre_ping=True,
-    pool_recycle=3600
+    pool_recycle=3600,
+    **pool_options
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -62,6 +75,16 @@ async def get_async_db() -> AsyncGenerator[Session, None]:
         db.close()
 
 
+@asynccontextmanager
+async def db_session() -> AsyncIterator[Session]:
+    """Async context manager providing a database session"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def get_redis() -> redis.Redis:
     """Get Redis client"""
     return redis_client
@@ -81,6 +104,8 @@ class WebSocketConnectionManager:
         self.active_connections: dict = {}  # session_id -> websocket
         self.game_sessions: dict = {}  # game_id -> set of session_ids
         self.session_info: dict = {}  # session_id -> session info
+        self.outboxes: dict = {}  # session_id -> queue of outgoing text frames
+        self.writers: dict = {}  # session_id -> writer task draining the outbox
         self._lock = asyncio.Lock()
     
     async def connect(self, websocket, session_id: str, game_id: str, client_info: dict = None):
@@ -100,14 +125,28 @@ class WebSocketConnectionManager:
                 'connected_at': asyncio.get_event_loop().time()
             }
             
+            # A single writer per session serializes sends to the socket
+            outbox = asyncio.Queue(maxsize=settings.websocket_outbox_size)
+            self.outboxes[session_id] = outbox
+            self.writers[session_id] = asyncio.create_task(
+                self._writer(session_id, websocket, outbox)
+            )
+            
             logger.info(f"WebSocket connected: {session_id} for game {game_id}")
     
-    async def disconnect(self, session_id: str):
-        """Disconnect a WebSocket"""
+    async def disconnect(self, session_id: str, close_code: int = None):
+        """Disconnect a WebSocket, closing its socket when a close code is given"""
+        websocket = None
         async with self._lock:
             if session_id in self.active_connections:
                 websocket = self.active_connections.pop(session_id)
                 
+                # Stop the writer; queued messages are dropped
+                self.outboxes.pop(session_id, None)
+                writer = self.writers.pop(session_id, None)
+                if writer is not None and writer is not asyncio.current_task():
+                    writer.cancel()
+                
                 # Remove from game sessions
                 session_info = self.session_info.get(session_id, {})
                 game_id = session_info.get('game_id')
@@ -120,57 +159,97 @@ class WebSocketConnectionManager:
                 self.session_info.pop(session_id, None)
                 
                 logger.info(f"WebSocket disconnected: {session_id}")
-    
-    async def send_personal_message(self, message: dict, session_id: str):
-        """Send a message to a specific session"""
-        if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
+        
+        # Server-initiated drops also close the socket so the endpoint's receive loop ends
+        if websocket is not None and close_code is not None:
             try:
-                await websocket.send_json(message)
-                return True
+                await asyncio.wait_for(
+                    websocket.close(code=close_code), settings.websocket_send_timeout
+                )
             except Exception as e:
-                logger.error(f"Error sending message to {session_id}: {str(e)}")
-                await self.disconnect(session_id)
-                return False
+                logger.debug(f"Error closing WebSocket {session_id}: {str(e)}")
+    
+    async def _writer(self, session_id: str, websocket, outbox: asyncio.Queue):
+        """Drain a session's outbox to its socket"""
+        try:
+            while True:
+                text = await outbox.get()
+                await asyncio.wait_for(
+                    websocket.send_text(text), settings.websocket_send_timeout
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending message to {session_id}: {str(e)}")
+            await self.disconnect(session_id, close_code=1011)
+    
+    def _enqueue(self, text: str, session_id: str) -> bool:
+        """Queue a text frame for a session; False if it is gone or too far behind"""
+        outbox = self.outboxes.get(session_id)
+        if outbox is None:
+            return False
+        try:
+            outbox.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Outbox full for {session_id}, dropping slow client")
+            return False
+    
+    async def send_personal_message(self, payload: bytes, session_id: str):
+        """Send a pre-encoded JSON message to a specific session"""
+        if self._enqueue(payload.decode(), session_id):
+            return True
+        await self.disconnect(session_id, close_code=1013)
         return False
     
-    async def broadcast_to_game(self, message: dict, game_id: str, exclude_session: str = None):
-        """Broadcast a message to all sessions of a game"""
+    async def broadcast_bytes(self, payload: bytes, game_id: str, exclude_session: str = None):
+        """Broadcast a pre-encoded message to all sessions of a game"""
         if game_id not in self.game_sessions:
             return 0
         
+        # Decode once so every client receives the same frame
+        text = payload.decode()
+        batch_size = settings.websocket_broadcast_batch_size
         sent_count = 0
         sessions_to_remove = []
         
-        for session_id in self.game_sessions[game_id].copy():
+        recipients = list(self.game_sessions[game_id])
+        
+        for index, session_id in enumerate(recipients, 1):
             if exclude_session and session_id == exclude_session:
                 continue
-                
-            if await self.send_personal_message(message, session_id):
+            
+            if self._enqueue(text, session_id):
                 sent_count += 1
             else:
                 sessions_to_remove.append(session_id)
+            
+            # Yield to the event loop between batches so large broadcasts
+            # don't starve other connections; no yield after the final batch
+            if index % batch_size == 0 and index < len(recipients):
+                await asyncio.sleep(0)
         
         # Clean up failed sessions
         for session_id in sessions_to_remove:
-            await self.disconnect(session_id)
+            await self.disconnect(session_id, close_code=1013)
         
         return sent_count
     
-    async def broadcast_to_all(self, message: dict):
-        """Broadcast a message to all connected sessions"""
+    async def broadcast_to_all(self, payload: bytes):
+        """Broadcast a pre-encoded message to all connected sessions"""
+        text = payload.decode()
         sent_count = 0
         sessions_to_remove = []
         
         for session_id in list(self.active_connections.keys()):
-            if await self.send_personal_message(message, session_id):
+            if self._enqueue(text, session_id):
                 sent_count += 1
             else:
                 sessions_to_remove.append(session_id)
         
         # Clean up failed sessions
         for session_id in sessions_to_remove:
-            await self.disconnect(session_id)
+            await self.disconnect(session_id, close_code=1013)
         
         return sent_count
     
@@ -261,18 +340,18 @@ class RealtimeCache:
     
     async def set_realtime_action(self, action_id: str, action_data: dict, ttl: int = 60):
         """Store real-time action data"""
+        await self.set_realtime_action_raw(action_id, orjson.dumps(action_data), ttl)
+    
+    async def set_realtime_action_raw(self, action_id: str, payload: bytes, ttl: int = 60):
+        """Store already JSON-encoded real-time action data as is"""
         redis = await get_aioredis()
-        await redis.setex(
-            self._key(f"action:{action_id}"),
-            ttl,
-            str(action_data)
-        )
+        await redis.setex(self._key(f"action:{action_id}"), ttl, payload)
     
     async def get_realtime_action(self, action_id: str) -> dict:
         """Get real-time action data"""
         redis = await get_aioredis()
         data = await redis.get(self._key(f"action:{action_id}"))
-        return eval(data) if data else {}
+        return orjson.loads(data) if data else {}
 
 
 # Global realtime cache instance
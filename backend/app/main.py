@@ -238,5 +238,6 @@ if __name__ == "__main__":
         reload=settings.debug,
         log_level="info" if not settings.debug else "debug",
         ws_ping_interval=30,
-        ws_ping_timeout=10
+        ws_ping_timeout=10,
+        ws_per_message_deflate=settings.websocket_per_message_deflate
     )
\ No newline at end of file
@@ -2,8 +2,8 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text,
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Dict, Any, List, Optional, Union, Literal, Annotated
 from datetime import datetime
 from enum import Enum
 
@@ -249,6 +249,49 @@ class WebSocketActionOutcome(BaseModel):
     additional_metrics: Dict[str, Any] = Field(default_factory=dict)
 
 
+# Inbound WebSocket messages, discriminated on ``type`` so the payload is
+# validated into its concrete model in the same pass as the envelope
+class IncomingMessageBase(BaseModel):
+    timestamp: Optional[datetime] = None
+    session_id: Optional[str] = None
+    game_id: Optional[str] = None
+
+
+class HeartbeatMessage(IncomingMessageBase):
+    type: Literal[WebSocketMessageType.HEARTBEAT]
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BossActionRequestMessage(IncomingMessageBase):
+    type: Literal[WebSocketMessageType.BOSS_ACTION_REQUEST]
+    data: WebSocketBossActionRequest
+
+
+class ActionOutcomeMessage(IncomingMessageBase):
+    type: Literal[WebSocketMessageType.ACTION_OUTCOME]
+    data: WebSocketActionOutcome
+
+
+class UnhandledMessage(IncomingMessageBase):
+    type: Literal[
+        WebSocketMessageType.CONNECT,
+        WebSocketMessageType.DISCONNECT,
+        WebSocketMessageType.BOSS_ACTION_RESPONSE,
+        WebSocketMessageType.LEARNING_UPDATE,
+        WebSocketMessageType.ERROR,
+        WebSocketMessageType.STATUS
+    ]
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+IncomingWebSocketMessage = Annotated[
+    Union[HeartbeatMessage, BossActionRequestMessage, ActionOutcomeMessage, UnhandledMessage],
+    Field(discriminator="type")
+]
+
+incoming_message_adapter = TypeAdapter(IncomingWebSocketMessage)
+
+
 class LearningUpdateData(BaseModel):
     contexts_learned: int
     avg_effectiveness: float
@@ -21,10 +21,12 @@ logger = logging.getLogger(__name__)
 class AdaptiveBossService:
     """Main service for adaptive boss behavior system with real-time capabilities"""
     
-    def __init__(self):
-        self.embedding_service = EmbeddingService()
-        self.faiss_service = FAISSService()
-        self.jigsawstack_service = JigsawStackService()
+    def __init__(self, embedding_service: Optional[EmbeddingService] = None,
+                 faiss_service: Optional[FAISSService] = None,
+                 jigsawstack_service: Optional[JigsawStackService] = None):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.faiss_service = faiss_service or FAISSService()
+        self.jigsawstack_service = jigsawstack_service or JigsawStackService()
         self.redis_client = get_redis()
         
         # Cache settings
@@ -36,6 +38,9 @@ class AdaptiveBossService:
         # Real-time settings
         self.realtime_cache_ttl = 300  # 5 minutes
         self.performance_window = 100  # Track last 100 actions for performance
+        
+        # Event loop used to schedule background coroutines from executor threads
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
     
     def register_game(self, game_id: str, name: str, description: str, 
                      vocabulary: Dict[str, Any], db: Session) -> Dict[str, Any]:
@@ -263,7 +268,7 @@ class AdaptiveBossService:
             
             # Update real-time cache
             if request.realtime:
-                asyncio.create_task(self._update_realtime_cache(
+                self._run_in_background(self._update_realtime_cache(
                     request.game_id, boss_action_record.id, boss_action
                 ))
             
@@ -375,8 +380,8 @@ class AdaptiveBossService:
             logger.error(f"Error generating boss action async: {str(e)}")
             raise
     
-    def log_action_outcome(self, action_outcome: ActionOutcomeData, db: Session):
-        """Log the outcome of a boss action for learning"""
+    def log_action_outcome(self, action_outcome: ActionOutcomeData, db: Session) -> bool:
+        """Log the outcome of a boss action for learning; True if the action had no outcome before"""
         try:
             # Get the action record
             action = db.query(BossAction).filter(BossAction.id == action_outcome.action_id).first()
@@ -384,6 +389,7 @@ class AdaptiveBossService:
                 raise ValueError(f"Action {action_outcome.action_id} not found")
             
             # Update action with outcome data
+            is_new_outcome = action.effectiveness_score is None
             action.outcome = action_outcome.outcome.value
             action.effectiveness_score = action_outcome.effectiveness_score
             action.damage_dealt = action_outcome.damage_dealt
@@ -441,16 +447,17 @@ class AdaptiveBossService:
             
             logger.info(f"Logged action outcome: {action_outcome.outcome.value} "
                        f"(effectiveness: {action_outcome.effectiveness_score:.2f})")
+            return is_new_outcome
             
         except Exception as e:
             db.rollback()
             logger.error(f"Error logging action outcome: {str(e)}")
             raise
     
-    async def log_action_outcome_async(self, action_outcome: ActionOutcomeData, db: Session):
+    async def log_action_outcome_async(self, action_outcome: ActionOutcomeData, db: Session) -> bool:
         """Async version of log_action_outcome"""
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self.log_action_outcome, action_outcome, db)
+        return await loop.run_in_executor(None, self.log_action_outcome, action_outcome, db)
     
     def get_game_stats(self, game_id: str, db: Session) -> Dict[str, Any]:
         """Get statistics for a game's adaptive behavior system"""
@@ -486,9 +493,11 @@ class AdaptiveBossService:
                 BossAction.effectiveness_score.isnot(None)
             ).order_by(BossAction.created_at.desc()).limit(10).all()
             
+            # Oldest first, so callers can keep extending the window in order
+            recent_scores = [action.effectiveness_score for action in reversed(recent_actions)]
             recent_effectiveness = 0.0
-            if recent_actions:
-                recent_effectiveness = np.mean([action.effectiveness_score for action in recent_actions])
+            if recent_scores:
+                recent_effectiveness = np.mean(recent_scores)
             
             # Get real-time stats
             realtime_stats = asyncio.create_task(self._get_realtime_stats(game_id))
@@ -497,9 +506,11 @@ class AdaptiveBossService:
                 "game_id": game_id,
                 "total_contexts": total_contexts,
                 "total_actions": total_actions,
+                "scored_actions": len(actions_with_outcomes),
                 "avg_effectiveness": avg_effectiveness,
                 "success_rate": success_rate,
                 "recent_effectiveness": recent_effectiveness,
+                "recent_scores": recent_scores,
                 "faiss_stats": faiss_stats,
                 "learning_progress": {
                     "contexts_in_index": faiss_stats.get('total_contexts', 0),
@@ -639,6 +650,17 @@ class AdaptiveBossService:
             logger.error(f"Error getting real-time stats: {str(e)}")
             return {}
     
+    def _run_in_background(self, coro):
+        """Schedule a coroutine on the event loop, also when called from a worker thread"""
+        try:
+            asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            if self.event_loop is None:
+                coro.close()
+                logger.warning("No event loop available for background task")
+                return
+            asyncio.run_coroutine_threadsafe(coro, self.event_loop)
+    
     def _get_websocket_session_id(self, session_id: str, db: Session) -> Optional[int]:
         """Get WebSocket session database ID"""
         if not session_id:
@@ -1,6 +1,6 @@
 import openai
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 import hashlib
 from app.config import settings
@@ -8,6 +8,8 @@ from app.models import PlayerContextData
 import logging
 import asyncio
 import time
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +21,10 @@ class EmbeddingService:
         openai.api_key = settings.openai_api_key
         self.model = "text-embedding-ada-002"
         self.dimension = settings.embedding_dimension
-        self.cache = {}  # Simple in-memory cache for embeddings
+        self.cache = OrderedDict()  # LRU in-memory cache for embeddings
         self.cache_ttl = 3600  # 1 hour
+        self.max_cache_size = 1024
+        self._cache_lock = threading.Lock()  # Callers include executor threads
         self.batch_size = 100  # Maximum batch size for OpenAI
     
     def create_context_embedding(self, player_context: PlayerContextData) -> np.ndarray:
@@ -30,14 +34,10 @@ class EmbeddingService:
             context_hash = self.create_context_hash(player_context)
             
             # Check cache first
-            if context_hash in self.cache:
-                cache_entry = self.cache[context_hash]
-                if time.time() - cache_entry['timestamp'] < self.cache_ttl:
-                    logger.debug(f"Using cached embedding for context {context_hash[:16]}...")
-                    return cache_entry['embedding']
-                else:
-                    # Remove expired entry
-                    del self.cache[context_hash]
+            cached = self._get_cached_embedding(context_hash)
+            if cached is not None:
+                logger.debug(f"Using cached embedding for context {context_hash[:16]}...")
+                return cached
             
             # Convert player context to a structured text representation
             context_text = self._context_to_text(player_context)
@@ -51,10 +51,7 @@ class EmbeddingService:
             embedding = np.array(response.data[0].embedding, dtype=np.float32)
             
             # Cache the embedding
-            self.cache[context_hash] = {
-                'embedding': embedding,
-                'timestamp': time.time()
-            }
+            self._cache_embedding(context_hash, embedding)
             
             logger.info(f"Generated embedding with dimension: {embedding.shape}")
             return embedding
@@ -63,6 +60,32 @@ class EmbeddingService:
             logger.error(f"Error creating embedding: {str(e)}")
             raise
     
+    def _get_cached_embedding(self, context_hash: str) -> Optional[np.ndarray]:
+        """Return a fresh cached embedding and mark it recently used, dropping it if expired"""
+        with self._cache_lock:
+            cache_entry = self.cache.get(context_hash)
+            if cache_entry is None:
+                return None
+            
+            if time.time() - cache_entry['timestamp'] >= self.cache_ttl:
+                del self.cache[context_hash]
+                return None
+            
+            self.cache.move_to_end(context_hash)
+            return cache_entry['embedding']
+    
+    def _cache_embedding(self, context_hash: str, embedding: np.ndarray):
+        """Store an embedding, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self.cache[context_hash] = {
+                'embedding': embedding,
+                'timestamp': time.time()
+            }
+            self.cache.move_to_end(context_hash)
+            
+            while len(self.cache) > self.max_cache_size:
+                self.cache.popitem(last=False)
+    
     async def create_context_embedding_async(self, player_context: PlayerContextData) -> np.ndarray:
         """Async version of create_context_embedding"""
         loop = asyncio.get_event_loop()
@@ -149,11 +172,10 @@ class EmbeddingService:
         for i, context in enumerate(contexts):
             context_hash = self.create_context_hash(context)
             
-            if context_hash in self.cache:
-                cache_entry = self.cache[context_hash]
-                if time.time() - cache_entry['timestamp'] < self.cache_ttl:
-                    embeddings.append((i, cache_entry['embedding']))
-                    continue
+            cached = self._get_cached_embedding(context_hash)
+            if cached is not None:
+                embeddings.append((i, cached))
+                continue
             
             contexts_to_process.append(context)
             context_indices.append(i)
@@ -177,10 +199,7 @@ class EmbeddingService:
                 
                 # Cache the embedding
                 context_hash = self.create_context_hash(context)
-                self.cache[context_hash] = {
-                    'embedding': embedding,
-                    'timestamp': time.time()
-                }
+                self._cache_embedding(context_hash, embedding)
         
         # Sort by original index and return embeddings
         embeddings.sort(key=lambda x: x[0])
@@ -197,30 +216,33 @@ class EmbeddingService:
         valid_entries = 0
         expired_entries = 0
         
-        for entry in self.cache.values():
-            if current_time - entry['timestamp'] < self.cache_ttl:
-                valid_entries += 1
-            else:
-                expired_entries += 1
+        with self._cache_lock:
+            total_entries = len(self.cache)
+            for entry in self.cache.values():
+                if current_time - entry['timestamp'] < self.cache_ttl:
+                    valid_entries += 1
+                else:
+                    expired_entries += 1
         
         return {
-            'total_entries': len(self.cache),
+            'total_entries': total_entries,
             'valid_entries': valid_entries,
             'expired_entries': expired_entries,
-            'cache_hit_rate': valid_entries / max(1, len(self.cache)),
-            'memory_usage_mb': len(self.cache) * self.dimension * 4 / (1024 * 1024)  # Approximate
+            'cache_hit_rate': valid_entries / max(1, total_entries),
+            'memory_usage_mb': total_entries * self.dimension * 4 / (1024 * 1024)  # Approximate
         }
     
     def clear_expired_cache(self):
         """Clear expired cache entries"""
         current_time = time.time()
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if current_time - entry['timestamp'] >= self.cache_ttl
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
+        with self._cache_lock:
+            expired_keys = [
+                key for key, entry in self.cache.items()
+                if current_time - entry['timestamp'] >= self.cache_ttl
+            ]
+            
+            for key in expired_keys:
+                del self.cache[key]
         
         logger.info(f"Cleared {len(expired_keys)} expired cache entries")
         return len(expired_keys)
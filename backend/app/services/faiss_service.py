@@ -86,8 +86,10 @@ class FAISSService:
             index = self.get_or_create_index(game_id)
             
             with self.index_locks[game_id]:
+                # No-op for the usual contiguous float32 input; converts wider callers
+                embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+                
                 # Normalize embedding for cosine similarity
-                embedding = embedding.astype(np.float32)
                 embedding_normalized = embedding.copy()
                 faiss.normalize_L2(embedding_normalized.reshape(1, -1))
                 
@@ -112,7 +114,7 @@ class FAISSService:
                 
                 # Check if auto-optimization is needed
                 if self.entry_counts[game_id] % self.auto_optimize_threshold == 0:
-                    asyncio.create_task(self._auto_optimize_index(game_id))
+                    self._schedule_auto_optimize(game_id)
                 
                 logger.info(f"Added context {context_id} to FAISS index for game {game_id}")
         
@@ -120,6 +122,57 @@ class FAISSService:
             logger.error(f"Error adding context to FAISS index: {str(e)}")
             raise
     
+    def add_contexts_batch(self, game_id: str, context_ids: List[int], embeddings: np.ndarray,
+                           context_data_list: List[Dict[str, Any]], effectiveness_scores: List[float]):
+        """Add a batch of context embeddings to the index with a single add"""
+        matrix = np.array(embeddings, dtype=np.float32, order='C', ndmin=2)
+        
+        # Metadata is paired with index rows by position, so a short list would misalign every later lookup
+        if not len(context_ids) == len(context_data_list) == len(effectiveness_scores) == matrix.shape[0]:
+            raise ValueError(
+                f"Batch length mismatch: {matrix.shape[0]} embeddings, {len(context_ids)} context ids, "
+                f"{len(context_data_list)} context data, {len(effectiveness_scores)} scores"
+            )
+        
+        try:
+            index = self.get_or_create_index(game_id)
+            
+            with self.index_locks[game_id]:
+                # Normalize the whole matrix in place for cosine similarity
+                faiss.normalize_L2(matrix)
+                
+                start_position = index.ntotal
+                index.add(matrix)
+                
+                for offset, (context_id, context_data, score) in enumerate(
+                    zip(context_ids, context_data_list, effectiveness_scores)
+                ):
+                    self.metadata[game_id].append({
+                        'context_id': context_id,
+                        'context_data': context_data,
+                        'effectiveness_score': score,
+                        'index_position': start_position + offset,
+                        'embedding_quality': self._calculate_embedding_quality(matrix[offset])
+                    })
+                
+                # Update entry count
+                previous_count = self.entry_counts.get(game_id, 0)
+                self.entry_counts[game_id] = previous_count + len(matrix)
+                
+                # Save to disk once for the whole batch
+                self._save_index(game_id)
+                
+                # Check if the batch crossed an auto-optimization boundary
+                if (previous_count // self.auto_optimize_threshold
+                        != self.entry_counts[game_id] // self.auto_optimize_threshold):
+                    self._schedule_auto_optimize(game_id)
+                
+                logger.info(f"Added {len(matrix)} contexts to FAISS index for game {game_id}")
+        
+        except Exception as e:
+            logger.error(f"Error adding context batch to FAISS index: {str(e)}")
+            raise
+    
     async def add_context_async(self, game_id: str, context_id: int, embedding: np.ndarray,
                               context_data: Dict[str, Any], effectiveness_score: float = 0.0):
         """Async version of add_context"""
@@ -144,8 +197,7 @@ class FAISSService:
             
             with self.index_locks[game_id]:
                 # Normalize query embedding
-                query_embedding = query_embedding.astype(np.float32)
-                query_normalized = query_embedding.copy()
+                query_normalized = np.array(query_embedding, dtype=np.float32)
                 faiss.normalize_L2(query_normalized.reshape(1, -1))
                 
                 # Search with more candidates than needed for filtering
@@ -302,15 +354,17 @@ class FAISSService:
             logger.error(f"Error removing ineffective contexts: {str(e)}")
             return 0
     
-    async def _auto_optimize_index(self, game_id: str):
+    def _schedule_auto_optimize(self, game_id: str):
+        """Start auto-optimization in the background; safe from worker threads without an event loop"""
+        self.executor.submit(self._auto_optimize_index, game_id)
+    
+    def _auto_optimize_index(self, game_id: str):
         """Auto-optimize index in background"""
         try:
             logger.info(f"Starting auto-optimization for game {game_id}")
             
             # Remove ineffective contexts
-            removed = await asyncio.get_event_loop().run_in_executor(
-                self.executor, self.remove_ineffective_contexts, game_id, 0.2
-            )
+            removed = self.remove_ineffective_contexts(game_id, 0.2)
             
             if removed > 0:
                 logger.info(f"Auto-optimization removed {removed} ineffective contexts for game {game_id}")
@@ -398,6 +452,12 @@ class FAISSService:
         except Exception as e:
             logger.error(f"Error saving index: {str(e)}")
     
+    def flush_indexes(self):
+        """Write every loaded index and its metadata to disk"""
+        for game_id in list(self.indexes):
+            with self.index_locks.get(game_id, threading.RLock()):
+                self._save_index(game_id)
+    
     def _save_metadata(self, game_id: str):
         """Save metadata to disk"""
         try:
@@ -426,6 +486,7 @@ class FAISSService:
                 self._create_new_index(game_id)
                 new_index = self.indexes[game_id]
                 new_metadata = []
+                new_embeddings = []
                 
                 for context in contexts:
                     if context.embedding_vector:
@@ -450,17 +511,15 @@ class FAISSService:
                             else:
                                 avg_effectiveness = 0.0
                             
-                            # Add to index
-                            embedding_normalized = embedding.copy()
-                            faiss.normalize_L2(embedding_normalized.reshape(1, -1))
-                            new_index.add(embedding_normalized.reshape(1, -1))
+                            # Collect for a single normalize and add below
+                            new_embeddings.append(embedding)
                             
                             # Add metadata
                             metadata_entry = {
                                 'context_id': context.id,
                                 'context_data': context.player_context,
                                 'effectiveness_score': avg_effectiveness,
-                                'index_position': new_index.ntotal - 1,
+                                'index_position': len(new_metadata),
                                 'embedding_quality': self._calculate_embedding_quality(embedding)
                             }
                             new_metadata.append(metadata_entry)
@@ -468,6 +527,12 @@ class FAISSService:
                         except Exception as e:
                             logger.warning(f"Error processing context {context.id}: {str(e)}")
                 
+                # Normalize all rows in one call and add them in one batch
+                if new_embeddings:
+                    matrix = np.vstack(new_embeddings)
+                    faiss.normalize_L2(matrix)
+                    new_index.add(matrix)
+                
                 # Replace metadata
                 self.metadata[game_id] = new_metadata
                 
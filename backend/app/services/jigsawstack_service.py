@@ -5,11 +5,34 @@ import aiohttp
 import time
 from typing import Dict, Any, List, Optional
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from app.config import settings
 from app.models import PlayerContextData, BossActionResponse
 
 logger = logging.getLogger(__name__)
 
+# Structured output requested for every generated boss action
+BOSS_ACTION_SCHEMA = {
+    "boss_action": "specific action to execute",
+    "action_type": "type of action (attack, defend, special, etc.)",
+    "intensity": "action intensity from 0.0 to 1.0",
+    "target_area": "where to target the action",
+    "duration": "action duration in seconds",
+    "cooldown": "cooldown before next action",
+    "animation_id": "animation identifier",
+    "sound_effects": ["list of sound effects"],
+    "visual_effects": ["list of visual effects"],
+    "damage_multiplier": "damage multiplier for this action",
+    "success_probability": "estimated success probability",
+    "confidence_level": "confidence in action effectiveness (0.0 to 1.0)",
+    "adaptation_reason": "why this action was chosen based on player behavior",
+    "counter_strategy": "how this action counters player patterns",
+    "reasoning": "detailed explanation of the decision"
+}
+
+# Approximate token budget for packing several player contexts into one prompt
+BATCH_PROMPT_TOKEN_LIMIT = 1500
+
 
 class JigsawStackService:
     """Service for interacting with JigsawStack Prompt Engine with async support"""
@@ -40,17 +63,16 @@ class JigsawStackService:
         if self.session and not self.session.closed:
             await self.session.close()
     
-    def create_boss_behavior_prompt(self, game_id: str, game_vocabulary: Dict[str, Any]) -> str:
-        """Create a game-specific boss behavior prompt template (sync version)"""
-        try:
-            # Extract game-specific elements
-            actions = game_vocabulary.get('boss_actions', [])
-            action_types = game_vocabulary.get('action_types', [])
-            environments = game_vocabulary.get('environments', [])
-            difficulty_levels = game_vocabulary.get('difficulty_levels', [])
-            
-            # Build the enhanced prompt template for real-time adaptation
-            prompt_template = f"""
+    def _build_prompt_payload(self, game_vocabulary: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the prompt engine payload for a game's boss behavior prompt"""
+        # Extract game-specific elements
+        actions = game_vocabulary.get('boss_actions', [])
+        action_types = game_vocabulary.get('action_types', [])
+        environments = game_vocabulary.get('environments', [])
+        difficulty_levels = game_vocabulary.get('difficulty_levels', [])
+        
+        # Build the enhanced prompt template for real-time adaptation
+        prompt_template = f"""
 You are an adaptive AI boss in the game "{game_vocabulary.get('game_name', 'Unknown Game')}". 
 Your goal is to provide challenging but fair gameplay that adapts to the player's behavior and skill level in real-time.
 
@@ -101,66 +123,55 @@ REAL-TIME ADAPTATION RULES:
 Focus on creating engaging, adaptive gameplay that learns from past interactions and responds to real-time player behavior.
 """
 
-            # Create the prompt in JigsawStack
-            payload = {
-                "prompt": prompt_template,
-                "inputs": [
-                    {
-                        "key": "player_context",
-                        "optional": False,
-                        "initial_value": "Player context will be provided here"
-                    },
-                    {
-                        "key": "similar_contexts",
-                        "optional": True,
-                        "initial_value": "No similar contexts found"
-                    },
-                    {
-                        "key": "boss_health",
-                        "optional": False,
-                        "initial_value": "100"
-                    },
-                    {
-                        "key": "battle_phase",
-                        "optional": False,
-                        "initial_value": "opening"
-                    },
-                    {
-                        "key": "environment",
-                        "optional": True,
-                        "initial_value": "standard arena"
-                    },
-                    {
-                        "key": "realtime_factors",
-                        "optional": True,
-                        "initial_value": "normal conditions"
-                    }
-                ],
-                "return_prompt": {
-                    "boss_action": "specific action to execute",
-                    "action_type": "type of action (attack, defend, special, etc.)",
-                    "intensity": "action intensity from 0.0 to 1.0",
-                    "target_area": "where to target the action",
-                    "duration": "action duration in seconds",
-                    "cooldown": "cooldown before next action",
-                    "animation_id": "animation identifier",
-                    "sound_effects": ["list of sound effects"],
-                    "visual_effects": ["list of visual effects"],
-                    "damage_multiplier": "damage multiplier for this action",
-                    "success_probability": "estimated success probability",
-                    "confidence_level": "confidence in action effectiveness (0.0 to 1.0)",
-                    "adaptation_reason": "why this action was chosen based on player behavior",
-                    "counter_strategy": "how this action counters player patterns",
-                    "reasoning": "detailed explanation of the decision"
+        return {
+            "prompt": prompt_template,
+            "inputs": [
+                {
+                    "key": "player_context",
+                    "optional": False,
+                    "initial_value": "Player context will be provided here"
                 },
-                "prompt_guard": [
-                    "sexual_content",
-                    "defamation",
-                    "hate",
-                    "violence_extreme"
-                ],
-                "optimize_prompt": True
-            }
+                {
+                    "key": "similar_contexts",
+                    "optional": True,
+                    "initial_value": "No similar contexts found"
+                },
+                {
+                    "key": "boss_health",
+                    "optional": False,
+                    "initial_value": "100"
+                },
+                {
+                    "key": "battle_phase",
+                    "optional": False,
+                    "initial_value": "opening"
+                },
+                {
+                    "key": "environment",
+                    "optional": True,
+                    "initial_value": "standard arena"
+                },
+                {
+                    "key": "realtime_factors",
+                    "optional": True,
+                    "initial_value": "normal conditions"
+                }
+            ],
+            "return_prompt": BOSS_ACTION_SCHEMA,
+            "prompt_guard": [
+                "sexual_content",
+                "defamation",
+                "hate",
+                "violence_extreme"
+            ],
+            "optimize_prompt": True
+        }
+    
+    def create_boss_behavior_prompt(self, game_id: str, game_vocabulary: Dict[str, Any]) -> str:
+        """Create a game-specific boss behavior prompt template (sync version)"""
+        try:
+            # Create the prompt in JigsawStack
+            payload = self._build_prompt_payload(game_vocabulary)
             
             response = requests.post(
                 f"{self.base_url}/prompt_engine",
@@ -176,16 +187,33 @@ Focus on creating engaging, adaptive gameplay that learns from past interactions
                 return prompt_engine_id
             else:
                 logger.error(f"Failed to create prompt: {response.status_code} - {response.text}")
-                raise Exception(f"Failed to create prompt: {response.text}")
+                raise requests.HTTPError(f"Failed to create prompt: {response.text}", response=response)
                 
         except Exception as e:
             logger.error(f"Error creating boss behavior prompt: {str(e)}")
             raise
     
     async def create_boss_behavior_prompt_async(self, game_id: str, game_vocabulary: Dict[str, Any]) -> str:
-        """Async version of create_boss_behavior_prompt"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.create_boss_behavior_prompt, game_id, game_vocabulary)
+        """Create a game-specific boss behavior prompt template (async version)"""
+        try:
+            session = await self._get_session()
+            payload = self._build_prompt_payload(game_vocabulary)
+            
+            async with session.post(f"{self.base_url}/prompt_engine", json=payload) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    prompt_engine_id = result.get("prompt_engine_id")
+                    logger.info(f"Created boss behavior prompt for game {game_id}: {prompt_engine_id}")
+                    return prompt_engine_id
+                
+                error_text = await response.text()
+                logger.error(f"Failed to create prompt: {response.status} - {error_text}")
+                response.raise_for_status()
+                raise Exception(f"Failed to create prompt: {error_text}")
+        
+        except Exception as e:
+            logger.error(f"Error creating boss behavior prompt: {str(e)}")
+            raise
     
     def generate_boss_action(self, prompt_engine_id: str, player_context: PlayerContextData,
                            similar_contexts: List[Dict[str, Any]], boss_health: float,
@@ -317,6 +345,105 @@ Focus on creating engaging, adaptive gameplay that learns from past interactions
             logger.error(f"Error in async boss action generation: {str(e)}")
             return self._create_fallback_action(player_context, boss_health, battle_phase)
     
+    def generate_boss_actions_batch(self, prompt_engine_id: str, game_vocabulary: Dict[str, Any],
+                                    player_contexts: List[PlayerContextData],
+                                    similar_contexts: List[Dict[str, Any]], boss_health: float,
+                                    battle_phase: str, environment: str = "standard arena") -> List[BossActionResponse]:
+        """Generate one boss action per player context with a single packed prompt; API errors are raised"""
+        if not player_contexts:
+            return []
+        
+        contexts_text = "\n".join(
+            f"{i}. {self._format_player_context(context)}"
+            for i, context in enumerate(player_contexts, 1)
+        )
+        
+        # Rough estimate of 4 characters per token
+        if len(contexts_text) // 4 > BATCH_PROMPT_TOKEN_LIMIT:
+            logger.info(f"Batch of {len(player_contexts)} contexts exceeds token budget, generating per context")
+            with ThreadPoolExecutor(max_workers=min(len(player_contexts), 8)) as executor:
+                return list(executor.map(
+                    lambda context: self.generate_boss_action(
+                        prompt_engine_id, context, similar_contexts,
+                        boss_health, battle_phase, environment
+                    ),
+                    player_contexts
+                ))
+        
+        prompt = f"""
+You are an adaptive AI boss in the game "{game_vocabulary.get('game_name', 'Unknown Game')}".
+Available boss actions: {', '.join(game_vocabulary.get('boss_actions', []))}
+Action types: {', '.join(game_vocabulary.get('action_types', []))}
+
+Return a JSON array of {{count}} boss actions, one per player context below and in the same order.
+
+PLAYER CONTEXTS:
+{{player_contexts}}
+
+SIMILAR PAST SITUATIONS:
+{{similar_contexts}}
+
+CURRENT BATTLE STATE:
+- Boss health: {{boss_health}}%
+- Battle phase: {{battle_phase}}
+- Environment: {{environment}}
+"""
+        
+        input_values = {
+            "count": str(len(player_contexts)),
+            "player_contexts": contexts_text,
+            "similar_contexts": self._format_similar_contexts(similar_contexts),
+            "boss_health": str(int(boss_health * 100)),
+            "battle_phase": battle_phase,
+            "environment": environment
+        }
+        
+        payload = {
+            "prompt": prompt,
+            "inputs": [{"key": key} for key in input_values],
+            "input_values": input_values,
+            "return_prompt": [BOSS_ACTION_SCHEMA]
+        }
+        
+        response = requests.post(
+            f"{self.base_url}/prompt_engine/run",
+            headers=self.headers,
+            json=payload,
+            timeout=self.request_timeout
+        )
+        
+        # HTTP errors propagate so callers can back off on rate limits
+        if response.status_code != 200:
+            logger.error(f"Failed to generate boss actions: {response.status_code}")
+            raise requests.HTTPError(f"Failed to generate boss actions: {response.text}", response=response)
+        
+        results = response.json().get("result", [])
+        if isinstance(results, str):
+            try:
+                results = json.loads(results)
+            except ValueError:
+                logger.warning("Batch result was not valid JSON, generating per context")
+                results = []
+        if not isinstance(results, list):
+            results = [results]
+        
+        boss_actions = [self._parse_boss_action_response(result) for result in results[:len(player_contexts)]]
+        
+        # Contexts the model skipped go through the game's stored prompt one at a time
+        missing = player_contexts[len(boss_actions):]
+        if missing:
+            logger.warning(f"Batch returned {len(boss_actions)} of {len(player_contexts)} boss actions")
+            boss_actions.extend(
+                self.generate_boss_action(
+                    prompt_engine_id, context, similar_contexts,
+                    boss_health, battle_phase, environment
+                )
+                for context in missing
+            )
+        
+        logger.info(f"Generated {len(boss_actions)} boss actions in one batch")
+        return boss_actions
+    
     def _format_player_context(self, player_context: PlayerContextData) -> str:
         """Format player context for the prompt"""
         context_parts = [
@@ -476,18 +603,20 @@ Focus on creating engaging, adaptive gameplay that learns from past interactions
             return {}
     
     async def delete_prompt_async(self, prompt_engine_id: str) -> bool:
-        """Delete a prompt (async version)"""
-        try:
-            session = await self._get_session()
-            
-            async with session.delete(f"{self.base_url}/prompt_engine/{prompt_engine_id}") as response:
-                if response.status == 200:
-                    logger.info(f"Deleted prompt: {prompt_engine_id}")
-                    return True
-                else:
-                    logger.error(f"Failed to delete prompt: {response.status}")
-                    return False
+        """Delete a prompt (async version); returns True, any non-200 response raises ClientResponseError"""
+        session = await self._get_session()
         
-        except Exception as e:
-            logger.error(f"Error deleting prompt: {str(e)}")
-            return False
\ No newline at end of file
+        async with session.delete(f"{self.base_url}/prompt_engine/{prompt_engine_id}") as response:
+            if response.status != 200:
+                logger.error(f"Failed to delete prompt: {response.status}")
+                # raise_for_status() lets 2xx/3xx through, so raise for every non-200 status here
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=f"Failed to delete prompt {prompt_engine_id}",
+                    headers=response.headers
+                )
+            
+            logger.info(f"Deleted prompt: {prompt_engine_id}")
+            return True
\ No newline at end of file
@@ -1,41 +1,107 @@
 import asyncio
-import json
+import itertools
 import time
 import uuid
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 import logging
+import orjson
+from pydantic import TypeAdapter
 
-from app.database import websocket_manager, realtime_cache, get_async_db
+from app.database import websocket_manager, realtime_cache, db_session, SessionLocal, engine
 from app.config import settings
 from app.models import (
     WebSocketMessage, WebSocketMessageType, BossActionRequest, BossActionResponse,
-    WebSocketBossActionRequest, WebSocketActionOutcome, LearningUpdateData,
-    RealtimeStats, WebSocketSession, Game
+    WebSocketBossActionRequest, WebSocketActionOutcome,
+    RealtimeStats, WebSocketSession, Game, incoming_message_adapter
 )
 from app.services.adaptive_boss_service import AdaptiveBossService
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam
+from sqlalchemy.dialects import postgresql, sqlite
 
 logger = logging.getLogger(__name__)
 
+# Weight of the newest sample in the average response time
+RESPONSE_TIME_EWMA_ALPHA = 0.05
+
+# Consecutive failed flushes after which queued session rows are dropped
+SESSION_FLUSH_MAX_ATTEMPTS = 3
+
+_message_adapter = TypeAdapter(WebSocketMessage)
+_boss_action_adapter = TypeAdapter(BossActionResponse)
+
+
+def encode_message(message: WebSocketMessage) -> bytes:
+    """Serialize a WebSocket message straight to JSON bytes, omitting unset optional fields"""
+    return _message_adapter.dump_json(message, exclude_none=True)
+
+
+# Placeholders substituted into pre-encoded message templates
+_SESSION_ID_SLOT_VALUE = "__SESSION_ID__"
+_TIMESTAMP_SLOT_VALUE = "__TIMESTAMP__"
+_SESSION_ID_SLOT = orjson.dumps(_SESSION_ID_SLOT_VALUE)
+_TIMESTAMP_SLOT = orjson.dumps(_TIMESTAMP_SLOT_VALUE)
+
+
+def _fill_template(segments: List[bytes], values: Tuple[bytes, ...]) -> bytes:
+    """Join pre-encoded template segments with the encoded slot values between them"""
+    parts = [segments[0]]
+    for value, segment in zip(values, segments[1:]):
+        parts.append(value)
+        parts.append(segment)
+    return b"".join(parts)
+
 
 class RealtimeAdaptiveBossService:
     """Real-time WebSocket service for adaptive boss behavior"""
     
     def __init__(self):
         self.adaptive_service = AdaptiveBossService()
-        self.active_requests: Dict[str, Dict[str, Any]] = {}  # request_id -> request_data
+        # request_id -> request_data, kept in arrival (and therefore expiry) order
+        self.active_requests: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.performance_metrics = {
-            'actions_per_minute': 0,
             'avg_response_time': 0.0,
             'total_requests': 0,
-            'successful_requests': 0,
-            'start_time': time.time()
+            'successful_requests': 0
+        }
+        # Per-second request counts over the last minute, indexed by second % 60
+        self._request_buckets = [0] * 60
+        self._bucket_seconds = [0] * 60
+        self._heartbeat_buffer: Dict[str, datetime] = {}  # session_id -> last heartbeat
+        self._pending_sessions: List[Dict[str, Any]] = []  # WebSocketSession rows to insert
+        self._session_flush_failures = 0
+        self._session_insert = self._session_upsert_statement()
+        self._game_pks: Dict[str, int] = {}  # game_id -> Game.id
+        self._welcome_templates: Dict[str, bytes] = {}  # game_id -> encoded CONNECT message
+        self._learning_update_templates: Dict[str, List[bytes]] = {}  # game_id -> template segments
+        # Request ids: random per-process prefix + counter, unique across restarts and workers
+        self._request_id_prefix = uuid.uuid4().hex[:8]
+        self._request_counter = itertools.count(1)
+        self._game_stats: Dict[str, Dict[str, Any]] = {}  # game_id -> rolling learning stats
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.realtime_worker_threads,
+            thread_name_prefix="boss-action"
+        )
+        self._boss_action_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.realtime_queue_size
+        )
+        
+        self._message_handlers = {
+            WebSocketMessageType.HEARTBEAT: self._handle_heartbeat,
+            WebSocketMessageType.BOSS_ACTION_REQUEST: self._handle_boss_action_request,
+            WebSocketMessageType.ACTION_OUTCOME: self._handle_action_outcome
         }
         
         # Start background tasks
         asyncio.create_task(self._cleanup_task())
         asyncio.create_task(self._metrics_update_task())
+        asyncio.create_task(self._heartbeat_flush_task())
+        asyncio.create_task(self._session_flush_task())
+        asyncio.create_task(self._game_stats_reconcile_task())
+        for _ in range(settings.realtime_worker_count):
+            asyncio.create_task(self._boss_action_worker())
     
     async def handle_websocket_connection(self, websocket, session_id: str, game_id: str, 
                                         access_token: str, client_info: Dict[str, Any]):
@@ -47,63 +113,99 @@ class RealtimeAdaptiveBossService:
             # Connect to WebSocket manager
             await websocket_manager.connect(websocket, session_id, game_id, client_info)
             
-            # Store session in database
-            async for db in get_async_db():
-                game = db.query(Game).filter(Game.game_id == game_id).first()
-                if game:
-                    ws_session = WebSocketSession(
-                        session_id=session_id,
-                        game_id=game.id,
-                        client_info=client_info,
-                        is_active=True
-                    )
-                    db.add(ws_session)
-                    db.commit()
-                break
-            
-            # Send welcome message
-            welcome_message = WebSocketMessage(
-                type=WebSocketMessageType.CONNECT,
-                data={
-                    'status': 'connected',
+            # Queue session row; inserted in bulk by _session_flush_task
+            game_pk = await self._get_game_pk(game_id)
+            if game_pk is not None:
+                self._pending_sessions.append({
                     'session_id': session_id,
-                    'game_id': game_id,
-                    'features': [
-                        'realtime_boss_actions',
-                        'learning_updates',
-                        'performance_metrics'
-                    ]
-                },
-                session_id=session_id,
-                game_id=game_id
-            )
+                    'game_id': game_pk,
+                    'client_info': client_info,
+                    'is_active': True
+                })
             
-            await websocket_manager.send_personal_message(
-                welcome_message.dict(), session_id
+            # Send welcome message from the pre-encoded per-game template
+            welcome_payload = self._welcome_template(game_id).replace(
+                _SESSION_ID_SLOT, orjson.dumps(session_id)
+            ).replace(
+                _TIMESTAMP_SLOT, orjson.dumps(datetime.utcnow())
             )
             
+            await websocket_manager.send_personal_message(welcome_payload, session_id)
+            
             logger.info(f"WebSocket session established: {session_id} for game {game_id}")
             
         except Exception as e:
             logger.error(f"Error handling WebSocket connection: {str(e)}")
             await websocket_manager.disconnect(session_id)
     
-    async def handle_websocket_message(self, websocket, session_id: str, message_data: dict):
+    def _welcome_template(self, game_id: str) -> bytes:
+        """Get the encoded CONNECT message for a game with per-session slots"""
+        template = self._welcome_templates.get(game_id)
+        if template is None:
+            template = orjson.dumps({
+                'type': WebSocketMessageType.CONNECT,
+                'data': {
+                    'status': 'connected',
+                    'session_id': _SESSION_ID_SLOT_VALUE,
+                    'game_id': game_id,
+                    'features': [
+                        'realtime_boss_actions',
+                        'learning_updates',
+                        'performance_metrics'
+                    ]
+                },
+                'timestamp': _TIMESTAMP_SLOT_VALUE,
+                'session_id': _SESSION_ID_SLOT_VALUE,
+                'game_id': game_id
+            })
+            self._welcome_templates[game_id] = template
+        return template
+    
+    def _learning_update_template(self, game_id: str) -> List[bytes]:
+        """Get the encoded LEARNING_UPDATE message for a game, split around its slots"""
+        segments = self._learning_update_templates.get(game_id)
+        if segments is None:
+            slots = [f"__SLOT_{index}__" for index in range(6)]
+            template = orjson.dumps({
+                'type': WebSocketMessageType.LEARNING_UPDATE,
+                'data': {
+                    'contexts_learned': slots[0],
+                    'avg_effectiveness': slots[1],
+                    'recent_improvements': [slots[2], slots[3]],
+                    'performance_trend': slots[4]
+                },
+                'timestamp': slots[5],
+                'game_id': game_id
+            })
+            segments = []
+            for slot in slots:
+                segment, template = template.split(orjson.dumps(slot), 1)
+                segments.append(segment)
+            segments.append(template)
+            self._learning_update_templates[game_id] = segments
+        return segments
+    
+    async def _get_game_pk(self, game_id: str) -> Optional[int]:
+        """Get the database id of a game, cached since it never changes"""
+        game_pk = self._game_pks.get(game_id)
+        if game_pk is None:
+            async with db_session() as db:
+                game = db.query(Game.id).filter(Game.game_id == game_id).first()
+            if game:
+                game_pk = self._game_pks[game_id] = game.id
+        return game_pk
+    
+    async def handle_websocket_message(self, websocket, session_id: str, raw_message: Union[str, bytes]):
         """Handle incoming WebSocket message"""
         try:
-            message = WebSocketMessage(**message_data)
-            
-            if message.type == WebSocketMessageType.HEARTBEAT:
-                await self._handle_heartbeat(session_id)
-            
-            elif message.type == WebSocketMessageType.BOSS_ACTION_REQUEST:
-                await self._handle_boss_action_request(session_id, message.data)
-            
-            elif message.type == WebSocketMessageType.ACTION_OUTCOME:
-                await self._handle_action_outcome(session_id, message.data)
+            # Parse the raw frame and its typed payload in one pass
+            message = incoming_message_adapter.validate_json(raw_message)
             
-            else:
+            handler = self._message_handlers.get(message.type)
+            if handler is None:
                 logger.warning(f"Unknown message type: {message.type}")
+            else:
+                await handler(session_id, message.data)
                 
         except Exception as e:
             logger.error(f"Error handling WebSocket message: {str(e)}")
@@ -112,21 +214,12 @@ class RealtimeAdaptiveBossService:
                 data={'error': str(e)},
                 session_id=session_id
             )
-            await websocket_manager.send_personal_message(
-                error_message.dict(), session_id
-            )
+            await websocket_manager.send_personal_message(encode_message(error_message), session_id)
     
-    async def _handle_heartbeat(self, session_id: str):
+    async def _handle_heartbeat(self, session_id: str, heartbeat_data: Dict[str, Any]):
         """Handle heartbeat message"""
-        # Update last heartbeat in database
-        async for db in get_async_db():
-            ws_session = db.query(WebSocketSession).filter(
-                WebSocketSession.session_id == session_id
-            ).first()
-            if ws_session:
-                ws_session.last_heartbeat = datetime.utcnow()
-                db.commit()
-            break
+        # Record heartbeat; persisted in batches by _heartbeat_flush_task
+        self._heartbeat_buffer[session_id] = datetime.utcnow()
         
         # Send heartbeat response
         response = WebSocketMessage(
@@ -134,17 +227,14 @@ class RealtimeAdaptiveBossService:
             data={'status': 'alive'},
             session_id=session_id
         )
-        await websocket_manager.send_personal_message(response.dict(), session_id)
+        await websocket_manager.send_personal_message(encode_message(response), session_id)
     
-    async def _handle_boss_action_request(self, session_id: str, request_data: dict):
+    async def _handle_boss_action_request(self, session_id: str, ws_request: WebSocketBossActionRequest):
         """Handle real-time boss action request"""
-        start_time = time.time()
-        request_id = str(uuid.uuid4())
+        start_time = time.monotonic()
+        request_id = f"{self._request_id_prefix}-{next(self._request_counter):x}"
         
         try:
-            # Parse request
-            ws_request = WebSocketBossActionRequest(**request_data)
-            
             # Get session info
             session_info = websocket_manager.get_session_info(session_id)
             game_id = session_info.get('game_id')
@@ -152,13 +242,15 @@ class RealtimeAdaptiveBossService:
             if not game_id:
                 raise ValueError("No game_id found for session")
             
-            # Store active request
+            # Store active request, evicting the oldest ones past the cap
             self.active_requests[request_id] = {
                 'session_id': session_id,
                 'game_id': game_id,
                 'start_time': start_time,
                 'request_data': ws_request.dict()
             }
+            while len(self.active_requests) > settings.max_active_requests:
+                self.active_requests.popitem(last=False)
             
             # Create boss action request
             boss_request = BossActionRequest(
@@ -171,10 +263,12 @@ class RealtimeAdaptiveBossService:
                 session_id=session_id
             )
             
-            # Generate boss action asynchronously
-            asyncio.create_task(self._generate_boss_action_async(
-                request_id, boss_request, session_id
-            ))
+            # Queue boss action generation for the worker pool
+            try:
+                self._boss_action_queue.put_nowait((request_id, boss_request, session_id))
+            except asyncio.QueueFull:
+                self.active_requests.pop(request_id, None)
+                raise RuntimeError("Server busy, retry the boss action request later")
             
             # Send immediate acknowledgment
             ack_message = WebSocketMessage(
@@ -186,7 +280,7 @@ class RealtimeAdaptiveBossService:
                 },
                 session_id=session_id
             )
-            await websocket_manager.send_personal_message(ack_message.dict(), session_id)
+            await websocket_manager.send_personal_message(encode_message(ack_message), session_id)
             
         except Exception as e:
             logger.error(f"Error handling boss action request: {str(e)}")
@@ -198,49 +292,77 @@ class RealtimeAdaptiveBossService:
                 },
                 session_id=session_id
             )
-            await websocket_manager.send_personal_message(error_message.dict(), session_id)
+            await websocket_manager.send_personal_message(encode_message(error_message), session_id)
+    
+    async def _boss_action_worker(self):
+        """Background worker that generates queued boss actions"""
+        self.adaptive_service.event_loop = asyncio.get_running_loop()
+        while True:
+            request_id, boss_request, session_id = await self._boss_action_queue.get()
+            try:
+                await self._generate_boss_action_async(request_id, boss_request, session_id)
+            except Exception as e:
+                logger.error(f"Error in boss action worker: {str(e)}")
+            finally:
+                self._boss_action_queue.task_done()
+    
+    def _generate_boss_action_blocking(self, boss_request: BossActionRequest) -> BossActionResponse:
+        """Generate a boss action on a worker thread with its own database session"""
+        db = SessionLocal()
+        try:
+            return self.adaptive_service.generate_boss_action(boss_request, db)
+        finally:
+            db.close()
     
     async def _generate_boss_action_async(self, request_id: str, boss_request: BossActionRequest, 
                                         session_id: str):
         """Generate boss action asynchronously"""
         try:
-            # Get database session
-            async for db in get_async_db():
-                # Generate boss action
-                boss_action = self.adaptive_service.generate_boss_action(boss_request, db)
-                
-                # Calculate response time
-                request_info = self.active_requests.get(request_id, {})
-                start_time = request_info.get('start_time', time.time())
-                response_time = time.time() - start_time
-                
-                # Update performance metrics
-                self._update_metrics(response_time, True)
-                
-                # Add response time to boss action
-                boss_action.response_time = response_time
-                
-                # Send response
-                response_message = WebSocketMessage(
-                    type=WebSocketMessageType.BOSS_ACTION_RESPONSE,
-                    data={
-                        'request_id': request_id,
-                        'boss_action': boss_action.dict()
-                    },
-                    session_id=session_id
-                )
-                
-                await websocket_manager.send_personal_message(
-                    response_message.dict(), session_id
-                )
-                
-                # Store in real-time cache
-                await realtime_cache.set_realtime_action(
-                    request_id, boss_action.dict(), ttl=300
-                )
-                
-                logger.info(f"Boss action generated for request {request_id} in {response_time:.3f}s")
-                break
+            # The action row looks up the session row, so insert queued sessions first
+            try:
+                await self._flush_pending_sessions()
+            except Exception as e:
+                logger.warning(f"Could not flush pending sessions: {str(e)}")
+            
+            # Generate boss action off the event loop
+            loop = asyncio.get_running_loop()
+            boss_action = await loop.run_in_executor(
+                self.executor, self._generate_boss_action_blocking, boss_request
+            )
+            
+            # Calculate response time
+            request_info = self.active_requests.get(request_id, {})
+            start_time = request_info.get('start_time', time.monotonic())
+            response_time = time.monotonic() - start_time
+            
+            # Update performance metrics
+            self._update_metrics(response_time, True)
+            
+            # Add response time to boss action
+            boss_action.response_time = response_time
+            
+            # Encode the action once; reused for the response and the cache
+            action_payload = _boss_action_adapter.dump_json(boss_action)
+            
+            # Send response
+            response_payload = orjson.dumps({
+                'type': WebSocketMessageType.BOSS_ACTION_RESPONSE,
+                'data': {
+                    'request_id': request_id,
+                    'boss_action': orjson.Fragment(action_payload)
+                },
+                'timestamp': datetime.utcnow(),
+                'session_id': session_id
+            })
+            
+            await websocket_manager.send_personal_message(response_payload, session_id)
+            
+            # Store in real-time cache
+            await realtime_cache.set_realtime_action_raw(
+                request_id, action_payload, ttl=300
+            )
+            
+            logger.info(f"Boss action generated for request {request_id} in {response_time:.3f}s")
                 
         except Exception as e:
             logger.error(f"Error generating boss action: {str(e)}")
@@ -254,23 +376,26 @@ class RealtimeAdaptiveBossService:
                 },
                 session_id=session_id
             )
-            await websocket_manager.send_personal_message(error_message.dict(), session_id)
+            await websocket_manager.send_personal_message(encode_message(error_message), session_id)
         
         finally:
             # Clean up active request
             self.active_requests.pop(request_id, None)
     
-    async def _handle_action_outcome(self, session_id: str, outcome_data: dict):
+    async def _handle_action_outcome(self, session_id: str, ws_outcome: WebSocketActionOutcome):
         """Handle action outcome from client"""
         try:
-            ws_outcome = WebSocketActionOutcome(**outcome_data)
-            
             # Get session info
             session_info = websocket_manager.get_session_info(session_id)
             game_id = session_info.get('game_id')
             
+            # Load rolling stats before logging so the snapshot does not already hold this outcome
+            stats = self._game_stats.get(game_id)
+            if stats is None:
+                stats = self._game_stats[game_id] = await self._load_learning_stats(game_id)
+            
             # Log outcome to database
-            async for db in get_async_db():
+            async with db_session() as db:
                 from app.models import ActionOutcomeData
                 outcome = ActionOutcomeData(
                     action_id=ws_outcome.action_id,
@@ -282,8 +407,11 @@ class RealtimeAdaptiveBossService:
                     additional_metrics=ws_outcome.additional_metrics
                 )
                 
-                self.adaptive_service.log_action_outcome(outcome, db)
-                break
+                is_new_outcome = self.adaptive_service.log_action_outcome(outcome, db)
+            
+            # Fold the outcome into the rolling stats; re-logged actions are updated in place in the DB
+            if is_new_outcome:
+                self._record_outcome(stats, ws_outcome.effectiveness_score)
             
             # Send learning update to all sessions of this game
             await self._broadcast_learning_update(game_id, ws_outcome.effectiveness_score)
@@ -296,62 +424,91 @@ class RealtimeAdaptiveBossService:
     async def _broadcast_learning_update(self, game_id: str, effectiveness_score: float):
         """Broadcast learning update to all game sessions"""
         try:
-            # Get game statistics
-            async for db in get_async_db():
-                stats = self.adaptive_service.get_game_stats(game_id, db)
-                break
-            
-            # Create learning update
-            learning_update = LearningUpdateData(
-                contexts_learned=stats.get('faiss_stats', {}).get('total_contexts', 0),
-                avg_effectiveness=stats.get('avg_effectiveness', 0.0),
-                recent_improvements=[
-                    f"Action effectiveness: {effectiveness_score:.1%}",
-                    f"Learning rate: {stats.get('learning_progress', {}).get('improvement_trend', 0):.1%}"
-                ],
-                performance_trend="improving" if effectiveness_score > 0.7 else "stable"
-            )
+            # Read the in-process rolling stats; no queries per outcome
+            stats = self._game_stats[game_id]
             
-            # Broadcast to all sessions of this game
-            update_message = WebSocketMessage(
-                type=WebSocketMessageType.LEARNING_UPDATE,
-                data=learning_update.dict(),
-                game_id=game_id
-            )
+            # Fill the pre-encoded per-game template; only the slots are encoded
+            payload = _fill_template(self._learning_update_template(game_id), (
+                orjson.dumps(stats['contexts_learned']),
+                orjson.dumps(stats['avg_effectiveness']),
+                orjson.dumps(f"Action effectiveness: {effectiveness_score:.1%}"),
+                # Same improvement_trend as get_game_stats: last-10 average minus lifetime average
+                orjson.dumps(f"Learning rate: {stats['improvement_trend']:.1%}"),
+                orjson.dumps("improving" if effectiveness_score > 0.7 else "stable"),
+                orjson.dumps(datetime.utcnow())
+            ))
             
-            await websocket_manager.broadcast_to_game(
-                update_message.dict(), game_id
-            )
+            # Every session receives the same payload
+            await websocket_manager.broadcast_bytes(payload, game_id)
             
         except Exception as e:
             logger.error(f"Error broadcasting learning update: {str(e)}")
     
+    async def _load_learning_stats(self, game_id: str) -> Dict[str, Any]:
+        """Build the rolling learning stats for a game from the database"""
+        async with db_session() as db:
+            db_stats = self.adaptive_service.get_game_stats(game_id, db)
+        scored_actions = db_stats.get('scored_actions', 0)
+        avg_effectiveness = float(db_stats.get('avg_effectiveness', 0.0))
+        return {
+            'contexts_learned': db_stats.get('faiss_stats', {}).get('total_contexts', 0),
+            'scored_actions': scored_actions,
+            'sum_effectiveness': avg_effectiveness * scored_actions,
+            'avg_effectiveness': avg_effectiveness,
+            'improvement_trend': float(
+                db_stats.get('learning_progress', {}).get('improvement_trend', 0.0)
+            ),
+            # Seeded with the latest scores so the trend matches get_game_stats from the start
+            'recent': deque(db_stats.get('recent_scores', []), maxlen=10)
+        }
+    
+    def _record_outcome(self, stats: Dict[str, Any], effectiveness_score: float):
+        """Update rolling learning stats with a new action outcome"""
+        stats['scored_actions'] += 1
+        stats['sum_effectiveness'] += effectiveness_score
+        stats['avg_effectiveness'] = stats['sum_effectiveness'] / stats['scored_actions']
+        stats['recent'].append(effectiveness_score)
+        stats['improvement_trend'] = (
+            sum(stats['recent']) / len(stats['recent']) - stats['avg_effectiveness']
+        )
+    
     def _update_metrics(self, response_time: float, success: bool):
         """Update performance metrics"""
         self.performance_metrics['total_requests'] += 1
         if success:
             self.performance_metrics['successful_requests'] += 1
         
-        # Update average response time
+        # Exponentially weighted average response time
         if response_time > 0:
             current_avg = self.performance_metrics['avg_response_time']
-            total_requests = self.performance_metrics['total_requests']
-            self.performance_metrics['avg_response_time'] = (
-                (current_avg * (total_requests - 1) + response_time) / total_requests
-            )
+            if current_avg == 0:
+                self.performance_metrics['avg_response_time'] = response_time
+            else:
+                self.performance_metrics['avg_response_time'] = (
+                    current_avg + RESPONSE_TIME_EWMA_ALPHA * (response_time - current_avg)
+                )
         
-        # Update actions per minute
-        elapsed_time = time.time() - self.performance_metrics['start_time']
-        if elapsed_time > 0:
-            self.performance_metrics['actions_per_minute'] = (
-                self.performance_metrics['total_requests'] / (elapsed_time / 60)
-            )
+        # Count the request in the bucket for the current second
+        second = time.monotonic_ns() // 1_000_000_000
+        slot = second % 60
+        if self._bucket_seconds[slot] != second:
+            self._bucket_seconds[slot] = second
+            self._request_buckets[slot] = 0
+        self._request_buckets[slot] += 1
+    
+    def _actions_per_minute(self) -> int:
+        """Number of requests handled during the last 60 seconds"""
+        oldest_second = time.monotonic_ns() // 1_000_000_000 - 59
+        return sum(
+            count for count, second in zip(self._request_buckets, self._bucket_seconds)
+            if second >= oldest_second
+        )
     
     async def get_realtime_stats(self) -> RealtimeStats:
         """Get real-time system statistics"""
         return RealtimeStats(
             active_sessions=websocket_manager.get_active_sessions_count(),
-            actions_per_minute=self.performance_metrics['actions_per_minute'],
+            actions_per_minute=self._actions_per_minute(),
             avg_response_time=self.performance_metrics['avg_response_time'],
             learning_rate=self.performance_metrics['successful_requests'] / max(1, self.performance_metrics['total_requests']),
             cache_hit_rate=0.85  # This would be calculated from actual cache metrics
@@ -371,21 +528,119 @@ class RealtimeAdaptiveBossService:
                 if cleaned > 0:
                     logger.info(f"Cleaned up {cleaned} inactive WebSocket sessions")
                 
-                # Clean up old active requests
-                current_time = time.time()
-                expired_requests = [
-                    req_id for req_id, req_data in self.active_requests.items()
-                    if current_time - req_data.get('start_time', 0) > settings.realtime_action_timeout
+                # Clean up old active requests; the oldest are always at the head
+                cutoff = time.monotonic() - settings.realtime_action_timeout
+                expired_count = 0
+                while self.active_requests:
+                    req_data = next(iter(self.active_requests.values()))
+                    if req_data.get('start_time', 0) >= cutoff:
+                        break
+                    self.active_requests.popitem(last=False)
+                    expired_count += 1
+                
+                if expired_count:
+                    logger.info(f"Cleaned up {expired_count} expired requests")
+                    
+            except Exception as e:
+                logger.error(f"Error in cleanup task: {str(e)}")
+    
+    async def _heartbeat_flush_task(self):
+        """Background task to persist buffered heartbeats in a single statement"""
+        table = WebSocketSession.__table__
+        statement = table.update().where(
+            table.c.session_id == bindparam('b_session_id')
+        ).values(last_heartbeat=bindparam('b_last_heartbeat'))
+        
+        while True:
+            try:
+                await asyncio.sleep(settings.websocket_heartbeat_flush_interval)
+                
+                if not self._heartbeat_buffer:
+                    continue
+                
+                # Heartbeats update session rows, so queued sessions must exist first
+                await self._flush_pending_sessions()
+                
+                heartbeats, self._heartbeat_buffer = self._heartbeat_buffer, {}
+                rows = [
+                    {'b_session_id': session_id, 'b_last_heartbeat': timestamp}
+                    for session_id, timestamp in heartbeats.items()
                 ]
                 
-                for req_id in expired_requests:
-                    self.active_requests.pop(req_id, None)
+                async with db_session() as db:
+                    db.execute(statement, rows)
+                    db.commit()
+                    
+            except Exception as e:
+                logger.error(f"Error in heartbeat flush task: {str(e)}")
+    
+    @staticmethod
+    def _session_upsert_statement():
+        """Session insert that reactivates the existing row when a client reuses its session_id"""
+        dialect = sqlite if engine.dialect.name == "sqlite" else postgresql
+        statement = dialect.insert(WebSocketSession.__table__)
+        return statement.on_conflict_do_update(
+            index_elements=['session_id'],
+            set_={
+                'game_id': statement.excluded.game_id,
+                'client_info': statement.excluded.client_info,
+                'is_active': statement.excluded.is_active
+            }
+        )
+    
+    async def _flush_pending_sessions(self):
+        """Upsert queued WebSocket sessions in a single statement, retrying a failed batch a few times"""
+        if not self._pending_sessions:
+            return
+        
+        rows, self._pending_sessions = self._pending_sessions, []
+        # One row per session_id; an upsert cannot touch the same row twice in one statement
+        rows = list({row['session_id']: row for row in rows}.values())
+        try:
+            async with db_session() as db:
+                db.execute(self._session_insert, rows)
+                db.commit()
+            self._session_flush_failures = 0
+        except Exception:
+            self._session_flush_failures += 1
+            if self._session_flush_failures < SESSION_FLUSH_MAX_ATTEMPTS:
+                # Put the rows back ahead of anything queued meanwhile so the next flush retries them
+                self._pending_sessions[:0] = rows
+            else:
+                logger.error(f"Dropping {len(rows)} WebSocket session rows after repeated flush failures")
+                self._session_flush_failures = 0
+            raise
+    
+    async def _session_flush_task(self):
+        """Background task to insert queued WebSocket sessions in a single statement"""
+        while True:
+            try:
+                await asyncio.sleep(settings.websocket_session_flush_interval)
+                await self._flush_pending_sessions()
+                    
+            except Exception as e:
+                logger.error(f"Error in session flush task: {str(e)}")
+    
+    async def _game_stats_reconcile_task(self):
+        """Background task to resync rolling learning stats with the database"""
+        while True:
+            try:
+                await asyncio.sleep(settings.game_stats_reconcile_interval)
                 
-                if expired_requests:
-                    logger.info(f"Cleaned up {len(expired_requests)} expired requests")
+                for game_id in list(self._game_stats):
+                    # Drop games nobody is connected to; they reload on next outcome
+                    if not websocket_manager.get_game_sessions_count(game_id):
+                        self._game_stats.pop(game_id, None)
+                        continue
+                    
+                    fresh_stats = await self._load_learning_stats(game_id)
+                    current_stats = self._game_stats.get(game_id)
+                    if current_stats is not None:
+                        fresh_stats['recent'] = current_stats['recent']
+                    self._game_stats[game_id] = fresh_stats
                     
             except Exception as e:
-                logger.error(f"Error in cleanup task: {str(e)}")
+                logger.error(f"Error in game stats reconcile task: {str(e)}")
     
     async def _metrics_update_task(self):
         """Background task to update metrics"""
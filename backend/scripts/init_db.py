@@ -7,6 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import text
 from app.database import init_db, engine
 from app.models import Base
 from app.config import settings
@@ -33,7 +34,7 @@ def check_database_connection():
     try:
         logger.info("Testing database connection...")
         with engine.connect() as conn:
-            result = conn.execute("SELECT 1")
+            result = conn.execute(text("SELECT 1"))
             logger.info("✅ Database connection successful!")
             return True
     except Exception as e:
@@ -8,6 +8,13 @@ import os
 import asyncio
 import json
 import time
+import random
+import threading
+import functools
+from collections import deque
+import numpy as np
+import requests
+import aiohttp
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.adaptive_boss_service import AdaptiveBossService
@@ -17,19 +24,160 @@ from app.services.jigsawstack_service import JigsawStackService
 from app.models import PlayerContextData, BossActionRequest, ActionOutcomeData, GameActionOutcome
 from app.database import SessionLocal
 import logging
+from pathlib import Path
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embeddings for the fixed test contexts are reused across runs
+EMBEDDING_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "embeddings"
+
+# Stay under the JigsawStack per-minute quota before the API starts returning 429s
+JIGSAWSTACK_REQUESTS_PER_MINUTE = 60
+_jigsawstack_calls = deque()
+_jigsawstack_calls_lock = threading.Lock()
+
+
+def _throttle_jigsawstack():
+    """Block until another JigsawStack request fits in the per-minute quota"""
+    while True:
+        with _jigsawstack_calls_lock:
+            now = time.monotonic()
+            while _jigsawstack_calls and now - _jigsawstack_calls[0] >= 60:
+                _jigsawstack_calls.popleft()
+            
+            if len(_jigsawstack_calls) < JIGSAWSTACK_REQUESTS_PER_MINUTE:
+                _jigsawstack_calls.append(now)
+                return
+            
+            wait = 60 - (now - _jigsawstack_calls[0])
+        time.sleep(wait)
+
+
+def _response_status(error):
+    """Extract the HTTP status from a requests or aiohttp error"""
+    if isinstance(error, requests.HTTPError):
+        return error.response.status_code if error.response is not None else None
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status
+    return None
+
+
+def retry_on_rate_limit(max_tries=3, base_delay=1.0):
+    """Retry a JigsawStack call with exponential backoff when it is rate limited"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_tries):
+                    await asyncio.to_thread(_throttle_jigsawstack)
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        if _response_status(e) != 429 or attempt == max_tries - 1:
+                            raise
+                        delay = base_delay * 2 ** attempt + random.random()
+                        logger.warning(f"⚠️  Rate limited, retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                _throttle_jigsawstack()
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if _response_status(e) != 429 or attempt == max_tries - 1:
+                        raise
+                    delay = base_delay * 2 ** attempt + random.random()
+                    logger.warning(f"⚠️  Rate limited, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+# Player context fixtures, validated once and copied for variations
+_BASE_CTX = PlayerContextData(
+    frequent_actions=["dodge", "attack"],
+    dodge_frequency=0.7,
+    attack_patterns=["combo_attack"],
+    movement_style="aggressive",
+    reaction_time=0.3,
+    health_percentage=0.8,
+    difficulty_preference="normal",
+    session_duration=10.0,
+    recent_deaths=1,
+    equipment_level=5
+)
+
+_INTEGRATION_CTX = PlayerContextData(
+    frequent_actions=["dodge", "attack", "block"],
+    dodge_frequency=0.6,
+    attack_patterns=["combo_attack", "hit_and_run"],
+    movement_style="balanced",
+    reaction_time=0.4,
+    health_percentage=0.7,
+    difficulty_preference="normal",
+    session_duration=15.0,
+    recent_deaths=2,
+    equipment_level=4
+)
+
+
+# Number of contexts swept by the FAISS test
+FAISS_TEST_CONTEXTS = 3
+
+
+def _context_grid(n):
+    """Build n variations of the base context from vectorized parameter columns"""
+    dodge = np.linspace(0.5, 0.5 + 0.1 * (n - 1), n).tolist()
+    reaction = np.linspace(0.3, 0.3 + 0.1 * (n - 1), n).tolist()
+    deaths = np.arange(n).tolist()
+    
+    return [
+        _BASE_CTX.model_copy(update={
+            "dodge_frequency": d,
+            "reaction_time": r,
+            "recent_deaths": k
+        })
+        for d, r, k in zip(dodge, reaction, deaths)
+    ]
+
+
+@functools.lru_cache(maxsize=1)
+def _embedding():
+    return EmbeddingService()
+
+
+@functools.lru_cache(maxsize=1)
+def _faiss():
+    return FAISSService()
+
+
+@functools.lru_cache(maxsize=1)
+def _jigsawstack():
+    return JigsawStackService()
+
+
+@functools.lru_cache(maxsize=1)
+def _adaptive():
+    # Share the service instances so indexes and clients are only loaded once
+    return AdaptiveBossService(
+        embedding_service=_embedding(),
+        faiss_service=_faiss(),
+        jigsawstack_service=_jigsawstack()
+    )
+
 
 class SystemTester:
     """Test the entire adaptive boss system"""
     
     def __init__(self):
-        self.adaptive_service = AdaptiveBossService()
-        self.embedding_service = EmbeddingService()
-        self.faiss_service = FAISSService()
-        self.jigsawstack_service = JigsawStackService()
+        self.adaptive_service = _adaptive()
+        self.embedding_service = _embedding()
+        self.faiss_service = _faiss()
+        self.jigsawstack_service = _jigsawstack()
         self.db = SessionLocal()
         
         # Test game configuration
@@ -49,27 +197,58 @@ class SystemTester:
             }
         }
     
+    @retry_on_rate_limit(max_tries=3, base_delay=1.0)
+    async def _create_prompt(self):
+        """Create the test game's JigsawStack prompt"""
+        return await self.jigsawstack_service.create_boss_behavior_prompt_async(
+            self.test_game["game_id"],
+            self.test_game["vocabulary"]
+        )
+    
+    @retry_on_rate_limit(max_tries=3, base_delay=1.0)
+    def _generate_actions(self, prompt_id, player_contexts, similar_contexts):
+        """Generate boss actions for a batch of test contexts"""
+        return self.jigsawstack_service.generate_boss_actions_batch(
+            prompt_id,
+            self.test_game["vocabulary"],
+            player_contexts,
+            similar_contexts,
+            0.8,  # boss_health
+            "opening",  # battle_phase
+            "arena"  # environment
+        )
+    
+    @retry_on_rate_limit(max_tries=3, base_delay=1.0)
+    async def _delete_prompt(self, prompt_id):
+        """Delete a test JigsawStack prompt"""
+        return await self.jigsawstack_service.delete_prompt_async(prompt_id)
+    
+    def _cached_embedding(self, player_context):
+        """Load a context embedding from the on-disk cache, generating it on a miss"""
+        # Keyed by model too, so switching embedding models never serves stale vectors
+        context_hash = self.embedding_service.create_context_hash(player_context)
+        cache_file = EMBEDDING_CACHE_DIR / self.embedding_service.model / f"{context_hash}.f32"
+        
+        if cache_file.exists():
+            return np.frombuffer(cache_file.read_bytes(), dtype=np.float32)
+        
+        embedding = np.ascontiguousarray(
+            self.embedding_service.create_context_embedding(player_context), dtype=np.float32
+        )
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(embedding.tobytes())
+        return embedding
+    
     def test_embedding_service(self):
         """Test embedding generation"""
         logger.info("🧪 Testing Embedding Service...")
         
         try:
-            # Create test player context
-            player_context = PlayerContextData(
-                frequent_actions=["dodge", "attack"],
-                dodge_frequency=0.7,
-                attack_patterns=["combo_attack"],
-                movement_style="aggressive",
-                reaction_time=0.3,
-                health_percentage=0.8,
-                difficulty_preference="normal",
-                session_duration=10.0,
-                recent_deaths=1,
-                equipment_level=5
-            )
+            # Shared test player context
+            player_context = _BASE_CTX
             
             # Generate embedding
-            embedding = self.embedding_service.create_context_embedding(player_context)
+            embedding = self._cached_embedding(player_context)
             logger.info(f"✅ Embedding generated: shape {embedding.shape}")
             
             # Test context hash
@@ -90,40 +269,29 @@ class SystemTester:
             game_id = self.test_game["game_id"]
             
             # Create test embeddings
-            test_contexts = []
-            for i in range(3):
-                context = PlayerContextData(
-                    frequent_actions=["dodge", "attack"],
-                    dodge_frequency=0.5 + i * 0.1,
-                    attack_patterns=["combo_attack"],
-                    movement_style="aggressive",
-                    reaction_time=0.3 + i * 0.1,
-                    health_percentage=0.8,
-                    difficulty_preference="normal",
-                    session_duration=10.0,
-                    recent_deaths=i,
-                    equipment_level=5
-                )
-                test_contexts.append(context)
+            test_contexts = _context_grid(FAISS_TEST_CONTEXTS)
             
             # Generate embeddings
             embeddings = self.embedding_service.batch_create_embeddings(test_contexts)
+            embeddings = [np.ascontiguousarray(e, dtype=np.float32) for e in embeddings]
             logger.info(f"✅ Generated {len(embeddings)} test embeddings")
             
-            # Add to FAISS index
-            for i, (context, embedding) in enumerate(zip(test_contexts, embeddings)):
-                self.faiss_service.add_context(
-                    game_id,
-                    i + 1,  # context_id
-                    embedding,
-                    context.model_dump(),
-                    0.7 + i * 0.1  # effectiveness_score
-                )
+            # Add to FAISS index in one batch
+            index = self.faiss_service.get_or_create_index(game_id)
+            previous_total = index.ntotal
+            self.faiss_service.add_contexts_batch(
+                game_id,
+                list(range(1, len(embeddings) + 1)),  # context_ids
+                np.vstack(embeddings).astype(np.float32, copy=False),
+                [context.model_dump() for context in test_contexts],
+                [0.7 + i * 0.1 for i in range(len(embeddings))]  # effectiveness_scores
+            )
+            assert index.ntotal == previous_total + len(embeddings)
             
             logger.info("✅ Added contexts to FAISS index")
             
             # Test similarity search
-            query_embedding = embeddings[0]
+            query_embedding = embeddings[0].astype(np.float32, copy=False)
             similar_contexts = self.faiss_service.search_similar_contexts(
                 game_id, query_embedding, k=2
             )
@@ -140,32 +308,18 @@ class SystemTester:
             logger.error(f"❌ FAISS service test failed: {str(e)}")
             return False
     
-    def test_jigsawstack_service(self):
+    async def test_jigsawstack_service(self):
         """Test JigsawStack integration"""
         logger.info("🧪 Testing JigsawStack Service...")
         
         try:
             # Create prompt for test game
-            prompt_id = self.jigsawstack_service.create_boss_behavior_prompt(
-                self.test_game["game_id"],
-                self.test_game["vocabulary"]
-            )
+            prompt_id = await self._create_prompt()
             
             logger.info(f"✅ Created JigsawStack prompt: {prompt_id}")
             
             # Test boss action generation
-            player_context = PlayerContextData(
-                frequent_actions=["dodge", "attack"],
-                dodge_frequency=0.7,
-                attack_patterns=["combo_attack"],
-                movement_style="aggressive",
-                reaction_time=0.3,
-                health_percentage=0.8,
-                difficulty_preference="normal",
-                session_duration=10.0,
-                recent_deaths=1,
-                equipment_level=5
-            )
+            player_context = _BASE_CTX
             
             similar_contexts = [
                 {
@@ -176,21 +330,27 @@ class SystemTester:
                 }
             ]
             
-            boss_action = self.jigsawstack_service.generate_boss_action(
-                prompt_id,
-                player_context,
-                similar_contexts,
-                0.8,  # boss_health
-                "opening",  # battle_phase
-                "arena"  # environment
+            # Generate actions for a batch of contexts in one request
+            batch_contexts = [
+                _BASE_CTX.model_copy(update={
+                    "dodge_frequency": 0.3 + i * 0.08,
+                    "recent_deaths": i % 3
+                })
+                for i in range(8)
+            ]
+            
+            boss_actions = await asyncio.to_thread(
+                self._generate_actions, prompt_id, batch_contexts, similar_contexts
             )
+            assert len(boss_actions) == len(batch_contexts)
             
-            logger.info(f"✅ Generated boss action: {boss_action.boss_action}")
-            logger.info(f"   Action type: {boss_action.action_type}")
-            logger.info(f"   Intensity: {boss_action.intensity}")
+            for boss_action in boss_actions:
+                logger.info(f"✅ Generated boss action: {boss_action.boss_action}")
+                logger.info(f"   Action type: {boss_action.action_type}")
+                logger.info(f"   Intensity: {boss_action.intensity}")
             
-            # Clean up - delete the test prompt
-            self.jigsawstack_service.delete_prompt(prompt_id)
+            # Clean up - delete the test prompt; a failed delete raises and fails the test
+            await self._delete_prompt(prompt_id)
             logger.info("✅ Cleaned up test prompt")
             
             return True
@@ -198,6 +358,10 @@ class SystemTester:
         except Exception as e:
             logger.error(f"❌ JigsawStack service test failed: {str(e)}")
             return False
+        
+        finally:
+            # The aiohttp session is bound to this event loop
+            await self.jigsawstack_service.close_session()
     
     def test_full_system_integration(self):
         """Test the complete system integration"""
@@ -220,18 +384,7 @@ class SystemTester:
             logger.info("✅ Game registered successfully")
             
             # Generate boss action
-            player_context = PlayerContextData(
-                frequent_actions=["dodge", "attack", "block"],
-                dodge_frequency=0.6,
-                attack_patterns=["combo_attack", "hit_and_run"],
-                movement_style="balanced",
-                reaction_time=0.4,
-                health_percentage=0.7,
-                difficulty_preference="normal",
-                session_duration=15.0,
-                recent_deaths=2,
-                equipment_level=4
-            )
+            player_context = _INTEGRATION_CTX
             
             request = BossActionRequest(
                 game_id=self.test_game["game_id"],
@@ -262,7 +415,9 @@ class SystemTester:
             
             # Get game stats
             stats = self.adaptive_service.get_game_stats(self.test_game["game_id"], self.db)
-            logger.info(f"✅ Game stats retrieved: {json.dumps(stats, indent=2)}")
+            logger.info("✅ Game stats retrieved: %s", list(stats))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Game stats: %s", json.dumps(stats, indent=2))
             
             return True
             
@@ -270,45 +425,57 @@ class SystemTester:
             logger.error(f"❌ Full system integration test failed: {str(e)}")
             return False
     
-    def run_all_tests(self):
+    async def _run_test(self, test_name, test_func):
+        """Run a single test, sync ones on a worker thread, and time it"""
+        logger.info(f"\n{'='*20} {test_name} {'='*20}")
+        start_time = time.perf_counter()
+        
+        try:
+            if asyncio.iscoroutinefunction(test_func):
+                success = await test_func()
+            else:
+                success = await asyncio.to_thread(test_func)
+            duration = time.perf_counter() - start_time
+            
+            if success:
+                logger.info(f"✅ {test_name} PASSED ({duration:.2f}s)")
+            else:
+                logger.error(f"❌ {test_name} FAILED ({duration:.2f}s)")
+            
+            return {"success": success, "duration": duration}
+            
+        except Exception as e:
+            duration = time.perf_counter() - start_time
+            logger.error(f"❌ {test_name} CRASHED ({duration:.2f}s): {str(e)}")
+            return {"success": False, "duration": duration, "error": str(e)}
+    
+    async def run_all_tests_async(self):
         """Run all system tests"""
         logger.info("🚀 Starting Adaptive Boss Behavior System Tests")
         logger.info("=" * 60)
         
-        tests = [
+        # The service tests are independent, so they run concurrently
+        independent_tests = [
             ("Embedding Service", self.test_embedding_service),
             ("FAISS Service", self.test_faiss_service),
-            ("JigsawStack Service", self.test_jigsawstack_service),
-            ("Full System Integration", self.test_full_system_integration)
+            ("JigsawStack Service", self.test_jigsawstack_service)
         ]
         
+        outcomes = await asyncio.gather(
+            *(self._run_test(name, func) for name, func in independent_tests),
+            return_exceptions=True
+        )
+        
         results = {}
+        for (test_name, _), outcome in zip(independent_tests, outcomes):
+            if isinstance(outcome, BaseException):
+                outcome = {"success": False, "duration": 0.0, "error": str(outcome)}
+            results[test_name] = outcome
         
-        for test_name, test_func in tests:
-            logger.info(f"\n{'='*20} {test_name} {'='*20}")
-            start_time = time.time()
-            
-            try:
-                success = test_func()
-                duration = time.time() - start_time
-                results[test_name] = {
-                    "success": success,
-                    "duration": duration
-                }
-                
-                if success:
-                    logger.info(f"✅ {test_name} PASSED ({duration:.2f}s)")
-                else:
-                    logger.error(f"❌ {test_name} FAILED ({duration:.2f}s)")
-                    
-            except Exception as e:
-                duration = time.time() - start_time
-                results[test_name] = {
-                    "success": False,
-                    "duration": duration,
-                    "error": str(e)
-                }
-                logger.error(f"❌ {test_name} CRASHED ({duration:.2f}s): {str(e)}")
+        # Integration depends on the services above, so it runs last
+        results["Full System Integration"] = await self._run_test(
+            "Full System Integration", self.test_full_system_integration
+        )
         
         # Summary
         logger.info("\n" + "="*60)
@@ -337,20 +504,25 @@ class SystemTester:
         """Clean up test resources"""
         try:
             self.db.close()
+            self.faiss_service.flush_indexes()
             logger.info("✅ Test cleanup completed")
         except Exception as e:
             logger.warning(f"⚠️  Cleanup warning: {str(e)}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.cleanup()
+        return False
 
 
 def main():
     """Main test function"""
-    tester = SystemTester()
+    with SystemTester() as tester:
+        success = asyncio.run(tester.run_all_tests_async())
     
-    try:
-        success = tester.run_all_tests()
-        sys.exit(0 if success else 1)
-    finally:
-        tester.cleanup()
+    sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
@@ -4,49 +4,33 @@ Database setup script for the adaptive learning system.
 This script creates the required database if it doesn't exist.
 """
 
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+import sys
 import os
-from dotenv import load_dotenv
+import psycopg
+from psycopg import errors, sql
+from sqlalchemy.engine import make_url
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
 
-# Load environment variables
-load_dotenv()
 
 def create_database():
     """Create the database if it doesn't exist."""
     try:
-        # Connect to default postgres database
-        conn = psycopg2.connect(
-            host="localhost",
-            database="postgres",
-            user="postgres",
-            password="vaibhav"
-        )
-        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        cursor = conn.cursor()
-        
-        # Check if database exists
-        cursor.execute("SELECT 1 FROM pg_database WHERE datname = 'adaptive_boss_db'")
-        if cursor.fetchone():
-            print("Database 'adaptive_boss_db' already exists.")
-        else:
-            # Create database
-            cursor.execute("CREATE DATABASE adaptive_boss_db")
-            print("Database 'adaptive_boss_db' created successfully.")
-        
-        cursor.close()
-        conn.close()
-        
-        # Test connection to the new database
-        test_conn = psycopg2.connect(
-            host="localhost",
-            database="adaptive_boss_db",
-            user="postgres",
-            password="vaibhav"
-        )
-        test_conn.close()
-        print("Successfully connected to 'adaptive_boss_db'.")
+        # Connect to the default postgres database using the configured credentials
+        url = make_url(settings.database_url)
+        database_name = url.database
+        admin_url = url.set(drivername="postgresql", database="postgres")
         
+        with psycopg.connect(admin_url.render_as_string(hide_password=False), autocommit=True) as conn:
+            # Attempt the create directly; an existing database is reported by the server
+            try:
+                conn.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(database_name)))
+                print(f"Database '{database_name}' created successfully.")
+            except errors.DuplicateDatabase:
+                print(f"Database '{database_name}' already exists.")
+    
     except Exception as e:
         print(f"Error setting up database: {e}")
         return False
@@ -5,21 +5,60 @@ Startup script for the Adaptive Boss Behavior System
 
 import sys
 import os
-import subprocess
-import time
+import asyncio
+import glob
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.config import settings
 from app.database import init_db, engine
-import redis
+from sqlalchemy import text
+import redis.asyncio as redis
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _flush_output():
+    """Flush log handlers and stdout before the process is replaced or killed"""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    sys.stdout.flush()
+
+
+def _abort(code: int):
+    """Exit immediately on a pre-startup failure, skipping interpreter teardown"""
+    _flush_output()
+    os._exit(code)
+
+
+def _ping_database():
+    """Run a trivial query against the database"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def _ping_redis():
+    """Ping Redis"""
+    redis_client = redis.from_url(settings.redis_url)
+    try:
+        await redis_client.ping()
+    finally:
+        await redis_client.close()
+
+
+async def _check_connections():
+    """Probe the database and Redis at the same time"""
+    return await asyncio.gather(
+        asyncio.to_thread(_ping_database),
+        _ping_redis(),
+        return_exceptions=True
+    )
+
+
 def check_dependencies():
     """Check if all required dependencies are available"""
     logger.info("🔍 Checking dependencies...")
@@ -34,25 +73,20 @@ def check_dependencies():
         logger.error("❌ JigsawStack API key not configured. Please set JIGSAWSTACK_API_KEY in .env")
         return False
     
-    # Check database connection
-    try:
-        with engine.connect() as conn:
-            conn.execute("SELECT 1")
-        logger.info("✅ Database connection successful")
-    except Exception as e:
-        logger.error(f"❌ Database connection failed: {str(e)}")
+    # Check database and Redis connections concurrently
+    db_result, redis_result = asyncio.run(_check_connections())
+    
+    if isinstance(db_result, Exception):
+        logger.error(f"❌ Database connection failed: {str(db_result)}")
         logger.error("Please ensure PostgreSQL is running and DATABASE_URL is correct")
         return False
+    logger.info("✅ Database connection successful")
     
-    # Check Redis connection
-    try:
-        redis_client = redis.from_url(settings.redis_url)
-        redis_client.ping()
-        logger.info("✅ Redis connection successful")
-    except Exception as e:
-        logger.error(f"❌ Redis connection failed: {str(e)}")
+    if isinstance(redis_result, Exception):
+        logger.error(f"❌ Redis connection failed: {str(redis_result)}")
         logger.error("Please ensure Redis is running and REDIS_URL is correct")
         return False
+    logger.info("✅ Redis connection successful")
     
     logger.info("✅ All dependencies check passed")
     return True
@@ -81,32 +115,49 @@ def create_directories():
         "data"
     ]
     
+    with ThreadPoolExecutor(max_workers=len(directories)) as executor:
+        list(executor.map(lambda d: os.makedirs(d, exist_ok=True), directories))
+    
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
         logger.info(f"✅ Created directory: {directory}")
 
 
+def prewarm_faiss_indexes():
+    """Read existing FAISS index files so the server's first load hits the page cache"""
+    index_files = glob.glob(os.path.join(settings.faiss_index_path, "*.index"))
+    buffer = bytearray(1 << 20)
+    for index_file in index_files:
+        # A sequential read pulls every page in; the exec'd server then loads from the page cache
+        with open(index_file, "rb", buffering=0) as f:
+            while f.readinto(buffer):
+                pass
+    
+    if index_files:
+        logger.info(f"✅ Pre-warmed {len(index_files)} FAISS indexes")
+
+
 def start_application():
     """Start the FastAPI application"""
     logger.info("🚀 Starting Adaptive Boss Behavior System...")
     
+    # Replace this process with uvicorn so the app is only imported by the server
+    argv = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+        "--host", settings.api_host,
+        "--port", str(settings.api_port),
+        "--log-level", "info" if not settings.debug else "debug",
+        "--ws-per-message-deflate", str(settings.websocket_per_message_deflate).lower()
+    ]
+    if settings.debug:
+        argv.append("--reload")
+    
     try:
-        # Import and run the application
-        from app.main import app
-        import uvicorn
-        
-        uvicorn.run(
-            app,
-            host=settings.api_host,
-            port=settings.api_port,
-            log_level="info" if not settings.debug else "debug",
-            reload=settings.debug
-        )
-    except KeyboardInterrupt:
-        logger.info("👋 Application stopped by user")
+        _flush_output()
+        os.execv(sys.executable, argv)
     except Exception as e:
         logger.error(f"❌ Application failed to start: {str(e)}")
-        sys.exit(1)
+        _abort(1)
 
 
 def main():
@@ -120,27 +171,28 @@ def main():
     if not os.path.exists(".env"):
         logger.warning("⚠️  .env file not found. Please copy .env.example to .env and configure it.")
         logger.info("You can continue with environment variables if they are set.")
-        time.sleep(2)
     
     # Check dependencies
     if not check_dependencies():
         logger.error("❌ Dependency check failed. Please fix the issues above.")
-        sys.exit(1)
+        _abort(1)
     
     # Initialize database
     if not initialize_database():
         logger.error("❌ Database initialization failed.")
-        sys.exit(1)
+        _abort(1)
     
     # Create directories
     create_directories()
     
+    # Pre-warm FAISS indexes
+    prewarm_faiss_indexes()
+    
     # Start the application
     logger.info("🎯 All checks passed. Starting the application...")
     logger.info(f"📡 API will be available at: http://{settings.api_host}:{settings.api_port}")
     logger.info(f"📚 Documentation will be available at: http://{settings.api_host}:{settings.api_port}/docs")
     
-    time.sleep(1)
     start_application()
 
 
@@ -2,15 +2,24 @@
 
 import os
 import sys
+from dotenv import dotenv_values
 sys.path.append('.')
 
 # Test if .env file is loaded
 print("Current working directory:", os.getcwd())
 print("Contents of .env file:")
-try:
-    with open('.env', 'r') as f:
-        print(f.read())
-except FileNotFoundError:
+env_values = {}
+# Snapshot the shell environment before .env is exported so the two sources can be compared
+shell_env = dict(os.environ)
+if os.path.exists('.env'):
+    env_values = dotenv_values('.env')
+    print("\n".join(f"{key}={value}" for key, value in env_values.items()))
+    # Export the parsed values once; shell variables keep precedence, as with load_dotenv()
+    os.environ.update({
+        key: value for key, value in env_values.items()
+        if value is not None and key not in shell_env
+    })
+else:
     print(".env file not found in current directory")
 
 # Test loading settings
@@ -22,8 +31,7 @@ print(f"API Host: {settings.api_host}")
 print(f"API Port: {settings.api_port}")
 print(f"Debug: {settings.debug}")
 
-# Test environment variables directly
+# Test environment variables directly, showing where each value came from
 print("\nEnvironment variables:")
-print(f"DATABASE_URL: {os.getenv('DATABASE_URL')}")
-print(f"API_HOST: {os.getenv('API_HOST')}")
-print(f"DEBUG: {os.getenv('DEBUG')}")
+for key in ("DATABASE_URL", "API_HOST", "DEBUG"):
+    print(f"{key}: {os.getenv(key)} (shell: {shell_env.get(key)}, .env: {env_values.get(key)})")
@@ -1,40 +1,151 @@
 """
 Real-time WebSocket client example for the Adaptive Boss Behavior System
+
+The module is fully annotated and checks cleanly under mypy --strict.
 """
 
 import asyncio
 import websockets
-import json
+from websockets.asyncio.client import ClientConnection, connect as ws_connect
 import time
-from typing import Dict, Any, Optional
+import logging
+import logging.handlers
+import queue
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import msgspec
+import orjson
+
+
+def _dumps(obj: Any) -> bytes:
+    # UTF-8 bytes go straight out as text frames, with no str round trip
+    return orjson.dumps(obj)
+
+
+logger = logging.getLogger(__name__)
+
+# Shared empty defaults for missing fields; never mutate these
+_EMPTY = ()
+_EMPTY_DICT: Dict[str, Any] = {}
+
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Route log records through a queue so console writes happen off the event loop"""
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(message)s"))
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    
+    listener = logging.handlers.QueueListener(log_queue, console)
+    listener.start()
+    return listener
+
+
+class BossActionData(msgspec.Struct):
+    """Boss action fields the client reads"""
+    boss_action: Optional[str] = None
+    action_type: Optional[str] = None
+    intensity: float = 0.5
+    response_time: Optional[float] = None
+    reasoning: Optional[str] = None
+
+
+class BossActionResponseData(msgspec.Struct):
+    """Payload of a boss_action_response message"""
+    boss_action: BossActionData = msgspec.field(default_factory=BossActionData)
+    request_id: Optional[str] = None
+
+
+class LearningUpdateData(msgspec.Struct):
+    """Payload of a learning_update message"""
+    contexts_learned: int = 0
+    avg_effectiveness: float = 0.0
+    performance_trend: str = "unknown"
+    recent_improvements: List[str] = []
+
+
+# Frames are tagged by their "type" field, so one decode picks the struct and fills it
+class _HeartbeatFrame(msgspec.Struct, tag_field="type", tag="heartbeat"):
+    data: Optional[Dict[str, Any]] = None
+
+
+class _BossActionResponseFrame(msgspec.Struct, tag_field="type", tag="boss_action_response"):
+    data: BossActionResponseData = msgspec.field(default_factory=BossActionResponseData)
+
+
+class _LearningUpdateFrame(msgspec.Struct, tag_field="type", tag="learning_update"):
+    data: LearningUpdateData = msgspec.field(default_factory=LearningUpdateData)
+
+
+class _StatusFrame(msgspec.Struct, tag_field="type", tag="status"):
+    data: Optional[Dict[str, Any]] = None
+
+
+class _ConnectFrame(msgspec.Struct, tag_field="type", tag="connect"):
+    data: Optional[Dict[str, Any]] = None
+
+
+class _ErrorFrame(msgspec.Struct, tag_field="type", tag="error"):
+    data: Optional[Dict[str, Any]] = None
+
+
+_Frame = Union[
+    _HeartbeatFrame, _BossActionResponseFrame, _LearningUpdateFrame,
+    _StatusFrame, _ConnectFrame, _ErrorFrame
+]
+
+# The typed decoder skips unknown fields and builds the payload in one pass, without an intermediate dict
+_FRAME_DECODER = msgspec.json.Decoder(_Frame)
+
 
 class AdaptiveBossWebSocketClient:
     """WebSocket client for real-time adaptive boss behavior"""
     
-    def __init__(self, base_url: str = "ws://localhost:8000/api/v1"):
-        self.base_url = base_url
-        self.websocket = None
-        self.game_id = None
-        self.access_token = None
-        self.session_id = None
-        self.is_connected = False
-        self.message_handlers = {}
+    def __init__(self, base_url: str = "ws://localhost:8000/api/v1", simulated_exec_time: float = 1.0) -> None:
+        self.base_url: str = base_url
+        # Set to 0 when benchmarking to measure client overhead rather than the simulated wait
+        self.simulated_exec_time: float = simulated_exec_time
+        self.websocket: Optional[ClientConnection] = None
+        self.game_id: Optional[str] = None
+        self.access_token: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.is_connected: bool = False
+        
+        # Wall clock is read once on connect; later timestamps are offset by the monotonic clock
+        self._connect_epoch_ms: int = 0
+        self._connect_monotonic_ns: int = 0
+        
+        # Outgoing frames are queued and drained by a single writer task
+        self._send_queue: Optional["asyncio.Queue[bytes]"] = None
+        self._writer_task: Optional["asyncio.Task[None]"] = None
+        
+        # Heartbeats are only sent when nothing else went out within the interval
+        self._heartbeat_task: Optional["asyncio.Task[None]"] = None
+        self._last_send_ns: int = 0
+        
+        # Received frames are handed to parser workers so a slow handler does not stall reads
+        self._parser_worker_count: int = 2
+        self._parser_queue_size: int = 256
         
-        # Set up default message handlers
-        self.message_handlers.update({
-            "connect": self._handle_connect,
-            "boss_action_response": self._handle_boss_action_response,
-            "learning_update": self._handle_learning_update,
-            "heartbeat": self._handle_heartbeat,
-            "error": self._handle_error,
-            "status": self._handle_status
-        })
-    
-    async def connect(self, game_id: str, access_token: str, session_id: Optional[str] = None):
+        # Heartbeat and pong frames serialized once per connection; only the timestamp changes per send
+        self._heartbeat_prefix: bytes = b""
+        self._heartbeat_suffix: bytes = b""
+        self._pong_prefix: bytes = b""
+        self._pong_suffix: bytes = b""
+    
+    async def connect(self, game_id: str, access_token: str, session_id: Optional[str] = None,
+                      heartbeat_interval: float = 10.0) -> None:
         """Connect to the WebSocket endpoint"""
         self.game_id = game_id
         self.access_token = access_token
-        self.session_id = session_id or f"client_{int(time.time())}"
+        self.session_id = session_id or f"client_{time.monotonic_ns()}"
+        self._connect_epoch_ms = int(time.time() * 1000)
+        self._connect_monotonic_ns = time.monotonic_ns()
+        self._heartbeat_prefix, self._heartbeat_suffix = self._frame_template("heartbeat", {})
+        self._pong_prefix, self._pong_suffix = self._frame_template("heartbeat", {"status": "pong"})
         
         # Build WebSocket URL
         url = f"{self.base_url}/ws/{game_id}?token={access_token}"
@@ -42,180 +153,302 @@ class AdaptiveBossWebSocketClient:
             url += f"&session_id={session_id}"
         
         try:
-            print(f"🔌 Connecting to {url}")
-            self.websocket = await websockets.connect(url)
+            logger.info("🔌 Connecting to %s", url)
+            # Frames are small JSON, so skip permessage-deflate and its per-frame zlib pass;
+            # a deep receive queue keeps the read pump going while a handler is busy
+            websocket = await ws_connect(
+                url,
+                compression=None,
+                max_queue=1024,
+                max_size=2 ** 20,
+                write_limit=2 ** 18
+            )
+            self.websocket = websocket
             self.is_connected = True
-            print(f"✅ Connected to WebSocket for game {game_id}")
+            logger.info("✅ Connected to WebSocket for game %s", game_id)
+            
+            # Start the writer before any handler can queue a reply
+            send_queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+            self._send_queue = send_queue
+            self._writer_task = asyncio.create_task(self._writer_loop(send_queue, websocket))
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop(heartbeat_interval))
             
             # Start message handling loop
-            await self._message_loop()
+            await self._message_loop(websocket)
             
         except Exception as e:
-            print(f"❌ Connection failed: {str(e)}")
+            logger.error("❌ Connection failed: %s", e)
             self.is_connected = False
             raise
     
-    async def disconnect(self):
+    def _frame_template(self, message_type: str, data: Dict[str, Any]) -> Tuple[bytes, bytes]:
+        """Serialize a fixed message, split where the timestamp goes"""
+        prefix, suffix = _dumps({
+            "type": message_type,
+            "data": data,
+            "timestamp": 0,
+            "session_id": self.session_id,
+            "game_id": self.game_id
+        }).split(b'"timestamp":0', 1)
+        return prefix + b'"timestamp":', suffix
+    
+    async def disconnect(self) -> None:
         """Disconnect from WebSocket"""
         if self.websocket and self.is_connected:
+            await self.flush()
             await self.websocket.close()
             self.is_connected = False
-            print("👋 Disconnected from WebSocket")
+            logger.info("👋 Disconnected from WebSocket")
+        
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+    
+    async def flush(self) -> None:
+        """Wait until every queued message has been written"""
+        if self._send_queue is not None and self._writer_task and not self._writer_task.done():
+            await self._send_queue.join()
     
-    async def send_message(self, message_type: str, data: Dict[str, Any]):
-        """Send a message to the server"""
+    async def _writer_loop(self, send_queue: "asyncio.Queue[bytes]", websocket: ClientConnection) -> None:
+        """Write queued frames to the socket in order until the connection closes"""
+        while True:
+            frame = await send_queue.get()
+            try:
+                # The server reads text frames; bytes are sent under the text opcode as-is
+                await websocket.send(frame, text=True)
+            except websockets.exceptions.ConnectionClosed:
+                logger.info("🔌 WebSocket connection closed, dropping %d queued messages", send_queue.qsize())
+                self.is_connected = False
+                # Release the dropped frames so a pending flush() does not wait forever
+                while not send_queue.empty():
+                    send_queue.get_nowait()
+                    send_queue.task_done()
+                return
+            except Exception as e:
+                logger.error("❌ Failed to send message: %s", e)
+            finally:
+                send_queue.task_done()
+    
+    def _timestamp_ms(self) -> int:
+        """Current epoch time in integer milliseconds"""
+        return self._connect_epoch_ms + (time.monotonic_ns() - self._connect_monotonic_ns) // 1_000_000
+    
+    async def send_message(self, message_type: str, data: Dict[str, Any]) -> None:
+        """Queue a message for the server"""
         if not self.is_connected or not self.websocket:
             raise Exception("Not connected to WebSocket")
         
-        message = {
+        # Queue the frame; the writer task performs the actual socket write
+        self._enqueue_frame(_dumps({
             "type": message_type,
             "data": data,
-            "timestamp": time.time(),
+            "timestamp": self._timestamp_ms(),
             "session_id": self.session_id,
             "game_id": self.game_id
-        }
-        
-        try:
-            await self.websocket.send(json.dumps(message))
-            print(f"📤 Sent {message_type} message")
-        except Exception as e:
-            print(f"❌ Failed to send message: {str(e)}")
-            raise
+        }))
+        logger.debug("📤 Queued %s message", message_type)
+    
+    def _enqueue_frame(self, frame: bytes) -> None:
+        """Hand an already serialized frame to the writer task"""
+        if self._send_queue is None:
+            raise Exception("Not connected to WebSocket")
+        self._send_queue.put_nowait(frame)
+        self._last_send_ns = time.monotonic_ns()
+    
+    async def _send_envelope(self, message_type: str, **data: Any) -> None:
+        """Send a message whose keyword arguments become its data payload"""
+        await self.send_message(message_type, data)
     
     async def request_boss_action(self, player_context: Dict[str, Any], 
                                 boss_health: float, battle_phase: str,
-                                environment_factors: Dict[str, Any] = None,
-                                request_id: str = None):
+                                environment_factors: Optional[Dict[str, Any]] = None,
+                                request_id: Optional[str] = None) -> None:
         """Request a boss action in real-time"""
-        data = {
-            "player_context": player_context,
-            "boss_health_percentage": boss_health,
-            "battle_phase": battle_phase,
-            "environment_factors": environment_factors or {},
-            "request_id": request_id or f"req_{int(time.time())}"
-        }
-        
-        await self.send_message("boss_action_request", data)
+        await self._send_envelope(
+            "boss_action_request",
+            player_context=player_context,
+            boss_health_percentage=boss_health,
+            battle_phase=battle_phase,
+            environment_factors=environment_factors or _EMPTY_DICT,
+            request_id=request_id or f"req_{time.monotonic_ns()}"
+        )
     
     async def log_action_outcome(self, action_id: int, outcome: str, 
                                effectiveness_score: float, damage_dealt: float,
                                player_hit: bool, execution_time: float,
-                               additional_metrics: Dict[str, Any] = None):
+                               additional_metrics: Optional[Dict[str, Any]] = None) -> None:
         """Log the outcome of a boss action"""
-        data = {
-            "action_id": action_id,
-            "outcome": outcome,
-            "effectiveness_score": effectiveness_score,
-            "damage_dealt": damage_dealt,
-            "player_hit": player_hit,
-            "execution_time": execution_time,
-            "additional_metrics": additional_metrics or {}
-        }
-        
-        await self.send_message("action_outcome", data)
+        await self._send_envelope(
+            "action_outcome",
+            action_id=action_id,
+            outcome=outcome,
+            effectiveness_score=effectiveness_score,
+            damage_dealt=damage_dealt,
+            player_hit=player_hit,
+            execution_time=execution_time,
+            additional_metrics=additional_metrics or _EMPTY_DICT
+        )
     
-    async def send_heartbeat(self):
+    async def send_heartbeat(self) -> None:
         """Send heartbeat to maintain connection"""
-        await self.send_message("heartbeat", {})
+        if not self.is_connected or not self.websocket:
+            raise Exception("Not connected to WebSocket")
+        
+        # Splice the current timestamp into the pre-serialized frame
+        self._enqueue_frame(b"%b%d%b" % (self._heartbeat_prefix, self._timestamp_ms(), self._heartbeat_suffix))
     
-    async def _message_loop(self):
+    async def _heartbeat_loop(self, interval: float) -> None:
+        """Send a heartbeat whenever the connection has been idle for a full interval"""
+        interval_ns = int(interval * 1e9)
+        while self.is_connected:
+            await asyncio.sleep(interval)
+            if self.is_connected and time.monotonic_ns() - self._last_send_ns >= interval_ns:
+                await self.send_heartbeat()
+    
+    async def _message_loop(self, websocket: ClientConnection) -> None:
         """Main message handling loop"""
+        # One queue per worker; frames of the same type always go to the same worker, keeping their order
+        parser_queues: List["asyncio.Queue[_Frame]"] = [
+            asyncio.Queue(maxsize=self._parser_queue_size) for _ in range(self._parser_worker_count)
+        ]
+        workers = [asyncio.create_task(self._parser_worker(q)) for q in parser_queues]
+        
         try:
-            async for message in self.websocket:
+            while True:
+                # Take the frame as raw bytes; the JSON parser validates UTF-8 itself
+                message = await websocket.recv(decode=False)
                 try:
-                    data = json.loads(message)
-                    message_type = data.get("type")
-                    message_data = data.get("data", {})
-                    
-                    print(f"📥 Received {message_type} message")
-                    
-                    # Handle message
-                    if message_type in self.message_handlers:
-                        await self.message_handlers[message_type](message_data)
-                    else:
-                        print(f"⚠️  Unknown message type: {message_type}")
+                    frame = _FRAME_DECODER.decode(message)
+                except msgspec.ValidationError as e:
+                    logger.warning("⚠️  Unrecognized message: %s", e)
+                    continue
+                except msgspec.DecodeError as e:
+                    logger.error("❌ Invalid JSON received: %s", e)
+                    continue
                 
-                except json.JSONDecodeError as e:
-                    print(f"❌ Invalid JSON received: {str(e)}")
-                except Exception as e:
-                    print(f"❌ Error handling message: {str(e)}")
+                logger.debug("📥 Received %s", type(frame).__name__)
+                await parser_queues[hash(type(frame)) % len(parser_queues)].put(frame)
         
         except websockets.exceptions.ConnectionClosed:
-            print("🔌 WebSocket connection closed")
+            logger.info("🔌 WebSocket connection closed")
             self.is_connected = False
         except Exception as e:
-            print(f"❌ Message loop error: {str(e)}")
+            logger.error("❌ Message loop error: %s", e)
             self.is_connected = False
+        finally:
+            for worker in workers:
+                worker.cancel()
+    
+    async def _parser_worker(self, parser_queue: "asyncio.Queue[_Frame]") -> None:
+        """Dispatch frames decoded by the receive loop"""
+        while True:
+            frame = await parser_queue.get()
+            try:
+                await self._dispatch(frame)
+            except Exception as e:
+                logger.error("❌ Error handling message: %s", e)
+            finally:
+                parser_queue.task_done()
+    
+    async def _dispatch(self, frame: _Frame) -> None:
+        """Route a decoded frame to its handler, most frequent types first"""
+        if isinstance(frame, _HeartbeatFrame):
+            await self._handle_heartbeat(frame.data or _EMPTY_DICT)
+        elif isinstance(frame, _BossActionResponseFrame):
+            await self._handle_boss_action_response(frame.data)
+        elif isinstance(frame, _LearningUpdateFrame):
+            await self._handle_learning_update(frame.data)
+        elif isinstance(frame, _StatusFrame):
+            await self._handle_status(frame.data or _EMPTY_DICT)
+        elif isinstance(frame, _ConnectFrame):
+            await self._handle_connect(frame.data or _EMPTY_DICT)
+        else:
+            await self._handle_error(frame.data or _EMPTY_DICT)
     
     # Message handlers
-    async def _handle_connect(self, data: Dict[str, Any]):
+    async def _handle_connect(self, data: Dict[str, Any]) -> None:
         """Handle connection confirmation"""
-        print(f"🎉 Connection confirmed: {data.get('status')}")
-        print(f"   Session ID: {data.get('session_id')}")
-        print(f"   Features: {', '.join(data.get('features', []))}")
+        logger.info(
+            "🎉 Connection confirmed: %s\n   Session ID: %s\n   Features: %s",
+            data.get('status'), data.get('session_id'), ', '.join(data.get('features') or _EMPTY)
+        )
     
-    async def _handle_boss_action_response(self, data: Dict[str, Any]):
+    async def _handle_boss_action_response(self, data: BossActionResponseData) -> None:
         """Handle boss action response"""
-        boss_action = data.get("boss_action", {})
-        request_id = data.get("request_id")
+        boss_action = data.boss_action
+        request_id = data.request_id
         
-        print(f"🎯 Boss Action Received (Request: {request_id}):")
-        print(f"   Action: {boss_action.get('boss_action')}")
-        print(f"   Type: {boss_action.get('action_type')}")
-        print(f"   Intensity: {boss_action.get('intensity'):.2f}")
-        print(f"   Response Time: {boss_action.get('response_time', 0):.3f}s")
+        logger.info(
+            "🎯 Boss Action Received (Request: %s):\n   Action: %s\n   Type: %s\n"
+            "   Intensity: %.2f\n   Response Time: %.3fs",
+            request_id, boss_action.boss_action, boss_action.action_type,
+            boss_action.intensity, boss_action.response_time or 0
+        )
         
-        if boss_action.get('reasoning'):
-            print(f"   Reasoning: {boss_action.get('reasoning')}")
+        if boss_action.reasoning:
+            logger.info("   Reasoning: %s", boss_action.reasoning)
         
         # Here you would execute the boss action in your game
-        await self._simulate_boss_action_execution(boss_action, request_id)
+        await self._simulate_boss_action_execution(boss_action, request_id, self.simulated_exec_time)
     
-    async def _handle_learning_update(self, data: Dict[str, Any]):
+    async def _handle_learning_update(self, data: LearningUpdateData) -> None:
         """Handle learning update"""
-        print(f"🧠 Learning Update:")
-        print(f"   Contexts Learned: {data.get('contexts_learned', 0)}")
-        print(f"   Avg Effectiveness: {data.get('avg_effectiveness', 0):.1%}")
-        print(f"   Performance Trend: {data.get('performance_trend', 'unknown')}")
+        logger.info(
+            "🧠 Learning Update:\n   Contexts Learned: %s\n   Avg Effectiveness: %.1f%%\n   Performance Trend: %s",
+            data.contexts_learned, data.avg_effectiveness * 100, data.performance_trend
+        )
         
-        improvements = data.get('recent_improvements', [])
+        improvements = data.recent_improvements
         if improvements:
-            print(f"   Recent Improvements: {', '.join(improvements)}")
+            logger.info("   Recent Improvements: %s", ', '.join(improvements))
     
-    async def _handle_heartbeat(self, data: Dict[str, Any]):
+    async def _handle_heartbeat(self, data: Dict[str, Any]) -> None:
         """Handle heartbeat"""
         if data.get('status') == 'ping':
-            # Respond to server ping
-            await self.send_message("heartbeat", {"status": "pong"})
+            # Respond to server ping with the pre-serialized pong frame
+            self._enqueue_frame(b"%b%d%b" % (self._pong_prefix, self._timestamp_ms(), self._pong_suffix))
     
-    async def _handle_error(self, data: Dict[str, Any]):
+    async def _handle_error(self, data: Dict[str, Any]) -> None:
         """Handle error message"""
-        print(f"❌ Server Error: {data.get('error', 'Unknown error')}")
+        logger.error("❌ Server Error: %s", data.get('error', 'Unknown error'))
     
-    async def _handle_status(self, data: Dict[str, Any]):
+    async def _handle_status(self, data: Dict[str, Any]) -> None:
         """Handle status message"""
         status = data.get('status')
         if status == 'processing':
-            print(f"⏳ Server processing request: {data.get('request_id')}")
-            print(f"   Estimated time: {data.get('estimated_time', 0)}s")
+            logger.info(
+                "⏳ Server processing request: %s\n   Estimated time: %ss",
+                data.get('request_id'), data.get('estimated_time', 0)
+            )
     
-    async def _simulate_boss_action_execution(self, boss_action: Dict[str, Any], request_id: str):
+    async def _simulate_boss_action_execution(self, boss_action: BossActionData, request_id: Optional[str],
+                                              simulated_exec_time: float = 1.0) -> None:
         """Simulate executing the boss action and log outcome"""
-        print(f"🎮 Executing boss action: {boss_action.get('boss_action')}")
+        logger.info("🎮 Executing boss action: %s", boss_action.boss_action)
         
-        # Simulate action execution
-        await asyncio.sleep(1.0)  # Simulate execution time
+        # Simulate action execution; a zero delay just yields instead of arming a timer
+        if simulated_exec_time <= 0:
+            simulated_exec_time = 0.0
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(simulated_exec_time)
         
-        # Simulate outcome
-        success = boss_action.get('intensity', 0.5) > 0.3  # Simple success logic
-        effectiveness = min(boss_action.get('intensity', 0.5) + 0.2, 1.0) if success else 0.2
-        damage = boss_action.get('intensity', 0.5) * 30 if success else 0
-        player_hit = success and boss_action.get('intensity', 0.5) > 0.4
+        # Simulate outcome; read intensity once and derive the rest arithmetically
+        intensity = boss_action.intensity
+        success = intensity > 0.3  # Simple success logic
+        s = float(success)
+        effectiveness = s * min(intensity + 0.2, 1.0) + (1.0 - s) * 0.2
+        damage = s * intensity * 30.0
+        player_hit = success and intensity > 0.4
         
-        print(f"   Result: {'Success' if success else 'Failed'}")
-        print(f"   Effectiveness: {effectiveness:.1%}")
-        print(f"   Damage: {damage:.1f}")
-        print(f"   Player Hit: {player_hit}")
+        logger.info(
+            "   Result: %s\n   Effectiveness: %.1f%%\n   Damage: %.1f\n   Player Hit: %s",
+            'Success' if success else 'Failed', effectiveness * 100, damage, player_hit
+        )
         
         # Log outcome (using dummy action_id for demo)
         await self.log_action_outcome(
@@ -224,16 +457,25 @@ class AdaptiveBossWebSocketClient:
             effectiveness_score=effectiveness,
             damage_dealt=damage,
             player_hit=player_hit,
-            execution_time=1.0,
+            execution_time=simulated_exec_time,
             additional_metrics={
                 "request_id": request_id,
-                "boss_action_type": boss_action.get('action_type'),
+                "boss_action_type": boss_action.action_type,
                 "player_reaction": "dodged" if not player_hit else "hit"
             }
         )
 
 
-async def main():
+# Demo request inputs that do not change between iterations
+_BATTLE_PHASES = ("opening", "mid_battle", "final_phase")
+_ENV_FACTORS = {
+    "environment": "arena",
+    "lighting": "dim",
+    "obstacles": ("pillars", "throne")
+}
+
+
+async def main() -> None:
     """Example usage of the WebSocket client"""
     print("🎮 Adaptive Boss WebSocket Client Example")
     print("=" * 50)
@@ -253,7 +495,7 @@ async def main():
         await asyncio.sleep(1)
         
         # Example player context
-        player_context = {
+        player_context: Dict[str, Any] = {
             "frequent_actions": ["dodge", "attack", "block"],
             "dodge_frequency": 0.7,
             "attack_patterns": ["combo_attack", "hit_and_run"],
@@ -279,12 +521,8 @@ async def main():
             await client.request_boss_action(
                 player_context=player_context,
                 boss_health=0.8 - (i * 0.2),  # Boss health decreases
-                battle_phase=["opening", "mid_battle", "final_phase"][i],
-                environment_factors={
-                    "environment": "arena",
-                    "lighting": "dim",
-                    "obstacles": ["pillars", "throne"]
-                },
+                battle_phase=_BATTLE_PHASES[i],
+                environment_factors=_ENV_FACTORS,
                 request_id=f"demo_request_{i+1}"
             )
             
@@ -297,10 +535,8 @@ async def main():
         
         print("\n3️⃣ Keeping connection alive...")
         
-        # Keep connection alive for a bit to see learning updates
-        for _ in range(5):
-            await client.send_heartbeat()
-            await asyncio.sleep(10)
+        # Keep connection alive for a bit to see learning updates; the client sends heartbeats when idle
+        await asyncio.sleep(50)
     
     except KeyboardInterrupt:
         print("\n👋 Interrupted by user")
@@ -317,7 +553,20 @@ if __name__ == "__main__":
     print("   1. Start the server: python -m app.main")
     print("   2. Register a game or get a token from: GET /api/v1/games/{game_id}/token")
     print("   3. Update the access_token variable above")
+    print("   4. Install uvloop (pip install uvloop) for a faster event loop")
     print()
     
+    # Use uvloop when available; the receive loop is bound by event-loop overhead
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    # Console output is written by a background listener thread
+    log_listener = setup_logging()
+    
     # Uncomment the line below to run the example
-    # asyncio.run(main())
\ No newline at end of file
+    # asyncio.run(main())
+    
+    log_listener.stop()
\ No newline at end of file